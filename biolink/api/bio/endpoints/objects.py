@@ -1,11 +1,15 @@
 import logging
+from collections import OrderedDict
+from functools import partial
 
 from flask import request
 from flask_restplus import Resource
-from biolink.datamodel.serializers import association_results, association, gene, drug, genotype, allele, search_result
+from flask_restplus.mask import Mask
+from biolink.datamodel.serializers import association_results, association, gene, gene_summary, drug, genotype, allele, search_result
 #import biolink.datamodel.serializers
 from biolink.api.restplus import api
 from biolink.util.golr_associations import search_associations
+from biolink.util.fanout import fan_out
 import pysolr
 
 log = logging.getLogger(__name__)
@@ -14,6 +18,8 @@ ns = api.namespace('bio', description='Retrieval of domain objects plus associat
 
 core_parser = api.parser()
 core_parser.add_argument('exclude_evidence', type=bool, help='If set, excludes evidence objects in response')
+# the response mask also determines which fields are fetched from solr
+core_parser.add_argument('X-Fields', location='headers', dest='mask', help='Response mask, e.g. {associations{id,subject}}')
 
 @ns.route('/gene/<id>')
 @api.doc(params={'id': 'id, e.g. NCBIGene:84570'})
@@ -104,6 +110,40 @@ class GenePublicationList(Resource):
         # could be retrieved by getting all associations and then extracting pubs
         return search_associations('gene', 'publication', None, id, **core_parser.parse_args())
     
+@ns.route('/gene/<id>/summary')
+@api.doc(params={'id': 'CURIE identifier of gene, e.g. NCBIGene:4750. Equivalent IDs can be used with same results'})
+class GeneSummary(Resource):
+
+    @api.expect(core_parser)
+    @api.marshal_with(gene_summary)
+    def get(self, id):
+        """
+        Returns interactions, phenotypes, expression and pubs for a gene
+
+        All association categories are queried concurrently
+        """
+        args = core_parser.parse_args()
+        mask = Mask(args.pop('mask') or '')
+
+        queries = OrderedDict([
+            ('interactions', ('gene', 'gene', 'RO:0002434')),
+            ('phenotypes', ('gene', 'phenotype', None)),
+            ('expressed', ('gene', 'anatomy', None)),
+            ('pubs', ('gene', 'publication', None)),
+        ])
+        calls = {}
+        for (name, (subject_category, object_category, relation)) in queries.items():
+            if mask and name not in mask and '*' not in mask:
+                # not rendered, so not queried
+                continue
+            # a leaf field in the mask is True, meaning all fields
+            submask = mask.get(name)
+            calls[name] = partial(search_associations, subject_category, object_category, relation, id,
+                                  mask=submask if isinstance(submask, Mask) else None, **args)
+        summary = fan_out(calls)
+        summary['id'] = id
+        return summary
+    
 @ns.route('/geneproduct/<id>')
 class GeneproductObject(Resource):
 
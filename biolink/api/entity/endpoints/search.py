@@ -2,8 +2,12 @@ import logging
 
 from flask import request
 from flask_restplus import Resource
-from biolink.datamodel.serializers import association
+from biolink.datamodel.serializers import association, sim_results, autocomplete_match
 from biolink.api.restplus import api
+from biolink import settings
+from biolink.core.ontology.similarity import METRICS
+from biolink.util.autocomplete import autocomplete, categories
+from biolink.util.backgrounds import get_similarity_engine, similarity_candidates
 import pysolr
 
 log = logging.getLogger(__name__)
@@ -17,6 +21,41 @@ parser.add_argument('negative_attribute', action='append', help='negative attrib
 parser.add_argument('weighted_attribute', action='append', help='weighted attributes, specified as a range from 0 to 1 plus an ontology term, e.g. 0.3*HP:0000001')
 parser.add_argument('noise', type=bool, help='If set, uses noise-tolerant querying, e.g owlsim, boqa')
 
+query_parser = parser.copy()
+query_parser.add_argument('category', default='disease', help='Category of entities to search, e.g. disease, gene')
+query_parser.add_argument('attribute_category', default='phenotype', help='Category of the attributes, e.g. phenotype')
+query_parser.add_argument('ontology', default='hp', help='Ontology of the attributes, e.g. hp')
+query_parser.add_argument('metric', choices=METRICS, help='Similarity metric; defaults to resnik if noise is set, otherwise simgic')
+query_parser.add_argument('rows', type=int, default=20, help='number of matches to return')
+
+autocomplete_parser = api.parser()
+autocomplete_parser.add_argument('category', action='append', help='Entity category to match, e.g. gene, disease, phenotype. May be repeated; defaults to all')
+autocomplete_parser.add_argument('taxon', help='Taxon of matching entities, e.g. NCBITaxon:9606; ontology terms always match')
+autocomplete_parser.add_argument('rows', type=int, default=10, help='number of matches to return')
+
+
+def check_rows(rows, maximum):
+    """
+    Returns rows if it is between 1 and maximum, or aborts with a 400
+    """
+    if not 1 <= rows <= maximum:
+        api.abort(400, 'rows must be between 1 and {}'.format(maximum))
+    return rows
+
+
+def parse_weighted_attribute(s):
+    """
+    Parses a weighted attribute, e.g. 0.3*HP:0000001, to (term, weight)
+    """
+    (weight, sep, term) = s.partition('*')
+    try:
+        weight = float(weight)
+    except ValueError:
+        weight = None
+    if not sep or not term or weight is None or not 0 <= weight <= 1:
+        api.abort(400, 'Invalid weighted attribute: {}'.format(s))
+    return (term, weight)
+
 @ns.route('/<term>')
 class SearchEntities(Resource):
 
@@ -34,33 +73,50 @@ class SearchEntities(Resource):
         return []
 
 @ns.route('/autocomplete/<term>')
-class Authocomplete(Resource):
-
+class Autocomplete(Resource):
 
-    @api.expect(parser)
-    @api.marshal_list_with(association)
-    def get(self, search_term):
+    @api.expect(autocomplete_parser)
+    @api.marshal_list_with(autocomplete_match)
+    def get(self, term):
         """
-        Returns list of matches
+        Returns entities with a label, synonym or ID starting with term
         """
-        args = parser.parse_args()
+        args = autocomplete_parser.parse_args()
 
-        return []
+        unknown = [c for c in args['category'] or [] if c not in categories()]
+        if unknown:
+            api.abort(400, 'Unknown category: {}; expected one of {}'.format(', '.join(unknown), ', '.join(categories())))
+        rows = check_rows(args['rows'], settings.AUTOCOMPLETE_MAX_ROWS)
+        return autocomplete(term, args['category'], args['taxon'], rows)
 
 @ns.route('/query/')
-class Authocomplete(Resource):
+class QueryEntities(Resource):
 
-
-    @api.expect(parser)
-    @api.marshal_list_with(association)
-    def get(self, search_term):
+    @api.expect(query_parser)
+    @api.marshal_with(sim_results)
+    def get(self):
         """
-        Returns list of matches
+        Returns entities best matching a profile of attributes, e.g. diseases matching a set of phenotypes
         """
-        args = parser.parse_args()
-
-        return []
-    
-    
-    
-
+        args = query_parser.parse_args()
+        rows = check_rows(args['rows'], settings.SIMILARITY_MAX_ROWS)
+
+        attributes = {}
+        for (term, weight) in map(parse_weighted_attribute, args['weighted_attribute'] or []):
+            attributes[term] = max(weight, attributes.get(term, 0))
+        for term in args['attribute'] or []:
+            attributes[term] = 1.0
+        if not attributes:
+            api.abort(400, 'At least one attribute or weighted_attribute is required')
+        metric = args['metric'] or ('resnik' if args['noise'] else 'simgic')
+
+        try:
+            engine = get_similarity_engine(args['ontology'], args['category'],
+                                           args['attribute_category'], args['subject_taxon'])
+        except KeyError:
+            supported = ['/'.join(str(v) for v in c) for c in similarity_candidates()]
+            api.abort(400, 'Unsupported query; expected one of {} (ontology/category/attribute_category/subject_taxon)'.format(', '.join(supported)))
+        return engine.search(attributes,
+                             negative_attributes=args['negative_attribute'],
+                             metric=metric,
+                             rows=rows)
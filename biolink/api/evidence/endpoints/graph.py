@@ -2,14 +2,12 @@ import logging
 
 from flask import request, send_file
 from flask_restplus import Resource
-from biolink.datamodel.serializers import association, bbop_graph
-from biolink.util.golr_associations import get_association
+from biolink.datamodel.serializers import association, bbop_graph, evidence_batch_query, evidence_batch_results
+from biolink.util.golr_associations import get_association, get_associations
+from biolink.util.evidence_graph import merge_graphs, to_obograph, summarize
 from biolink.api.restplus import api
-from biolink.core.ontology.obograph_util import convert_json_object
-import tempfile
+from biolink.util.graph_render import get_image, FORMATS
 import pysolr
-import matplotlib.pyplot as plt
-import networkx as nx
 
 log = logging.getLogger(__name__)
 
@@ -18,6 +16,9 @@ ns = api.namespace('evidence/graph', description='Operations on evidence graphs'
 parser = api.parser()
 #parser.add_argument('subject_taxon', help='SUBJECT TAXON id, e.g. NCBITaxon:9606. Includes inferred by default')
 
+image_parser = api.parser()
+image_parser.add_argument('format', default='png', choices=list(FORMATS), help='image format')
+
 @ns.route('/<id>')
 @api.doc(params={'id': 'association id, e.g. cfef92b7-bfa3-44c2-a537-579078d2de37'})
 class AssociationObject(Resource):
@@ -33,31 +34,57 @@ class AssociationObject(Resource):
         args = parser.parse_args()
 
         assoc = get_association(id)
-        eg = assoc.get('evidence_graph')
+        eg = assoc.evidence_graph
         return [eg]
 
-@ns.route('/<id>/image')
-class AssociationObject(Resource):
+@ns.route('/batch/')
+class AssociationObjectBatch(Resource):
 
-    @api.expect(parser)
-    def get(self,id):
+    @api.expect(evidence_batch_query)
+    @api.marshal_with(evidence_batch_results)
+    def post(self):
         """
-        Returns evidence graph as a png
+        Returns evidence graphs for many associations in one call
+
+        All associations are fetched in a single query. By default one
+        graph is returned per association; with merge set, a single
+        deduplicated graph; with summary set, evidence type and relation
+        counts only
         """
-        args = parser.parse_args()
+        query = request.json
+        try:
+            resultmap = get_associations(query.get('ids') or [], mask='id,evidence,evidence_graph')
+        except ValueError as e:
+            api.abort(400, str(e))
+        found = [a for a in resultmap.values() if a is not None]
+        response = {
+            'missing': [id for (id, a) in resultmap.items() if a is None],
+        }
+        merge = query.get('merge')
+        summary = query.get('summary')
+        if merge or summary:
+            # each access decodes the graph, so read it once per association
+            graph = merge_graphs(g for g in (a.evidence_graph for a in found) if g)
+            if merge:
+                response['merged'] = to_obograph(graph)
+            if summary:
+                response['summary'] = summarize(found, graph)
+        else:
+            response['graphs'] = [{'id': a.id, 'evidence_graph': a.evidence_graph} for a in found]
+        return response
 
-        assoc = get_association(id)
-        eg = {'graphs':[assoc.get('evidence_graph')]}
-        digraph = convert_json_object(eg)
-        #fp = tempfile.TemporaryFile()
-        nx.draw(digraph)
-        fn = '/tmp/'+id+'.png' # TODO
-        plt.savefig(fn)
-        return send_file(fn)
-        
-    
+@ns.route('/<id>/image')
+class AssociationImage(Resource):
 
+    @api.expect(image_parser)
+    def get(self,id):
+        """
+        Returns evidence graph as an image (png or svg)
 
-    
-    
+        Images are rendered once per distinct graph and then served from cache
+        """
+        args = image_parser.parse_args()
 
+        assoc = get_association(id, mask='id,evidence_graph')
+        fn = get_image(id, assoc.evidence_graph, args['format'])
+        return send_file(fn, mimetype=FORMATS[args['format']])
@@ -1,31 +1,67 @@
 import logging
+import re
+import time
+from functools import partial
 
 from flask import request
 from flask_restplus import Resource
-from biolink.datamodel.serializers import association
+from biolink.datamodel.serializers import association, cam_summary
 from biolink.api.restplus import api
-from SPARQLWrapper import SPARQLWrapper, JSON
+from biolink.core.lego.lego import query, grouped_counts
+from biolink.core.lego.store import get_store
+from biolink.util.fanout import fan_out_partial
+from biolink import settings
 
 log = logging.getLogger(__name__)
 
 ns = api.namespace('cam', description='Operations on causal activity models (LEGO)')
 
-sparql = SPARQLWrapper("http://rdf.geneontology.org/sparql")
-
-# TODO: implement cursor
-def query(q):
-    prefixes = """
-prefix directly_activates: <http://purl.obolibrary.org/obo/RO_0002406>
-prefix directly_positively_regulates: <http://purl.obolibrary.org/obo/RO_0002629>
-prefix enabled_by: <http://purl.obolibrary.org/obo/RO_0002333>
-prefix inferredG: <http://geneontology.org/rdf/inferred/>
-"""
-    sparql.setQuery(prefixes + q + " LIMIT 10")
-    sparql.setReturnFormat(JSON)
-    results = sparql.query().convert()
-    return results
-
 parser = api.parser()
+parser.add_argument('rows', type=int, required=False, default=10, help='number of rows')
+parser.add_argument('page', type=int, required=False, default=1, help='Page number')
+
+
+def paging(args):
+    """
+    Returns (rows, start) for the paging arguments, or aborts with a 400
+    """
+    rows = args['rows']
+    page = args['page']
+    if not 1 <= rows <= settings.LEGO_MAX_ROWS:
+        api.abort(400, 'rows must be between 1 and {}'.format(settings.LEGO_MAX_ROWS))
+    if page < 1:
+        api.abort(400, 'page must be 1 or more')
+    return (rows, (page - 1) * rows)
+
+
+MODELS_QUERY = """
+        SELECT ?x ?title WHERE 
+        {?x a owl:Ontology ; 
+           dc:title ?title
+        }
+        """
+
+ACTIVITY_COUNTS_QUERY = """
+        SELECT ?g (COUNT(DISTINCT ?a) AS ?n) WHERE
+        {VALUES ?g { %s }
+         GRAPH ?g {?a enabled_by: ?m }}
+        GROUP BY ?g
+        """
+
+# characters allowed in a SPARQL IRIREF
+IRI = re.compile(r'^[^<>"{}|^`\\\s]+$')
+
+
+def activity_counts(ids, timeout=None):
+    """
+    Number of activities in each of a list of models, as a dict, with
+    a single grouped query rather than one per model
+    """
+    ids = [id for id in ids if IRI.match(id)]
+    if not ids:
+        return {}
+    values = ' '.join('<{}>'.format(id) for id in ids)
+    return grouped_counts(ACTIVITY_COUNTS_QUERY % values, 'g', timeout)
 
 @ns.route('/graph/')
 class ModelCollection(Resource):
@@ -36,14 +72,65 @@ class ModelCollection(Resource):
         Returns list of models
         """
         args = parser.parse_args()
-        sparql.setQuery("""
-        SELECT ?x ?title WHERE 
-        {?x a owl:Ontology ; 
-           dc:title ?title
-        } LIMIT 10""")
-        sparql.setReturnFormat(JSON)
-        results = sparql.query().convert()
-        return results
+        (rows, start) = paging(args)
+        if settings.LEGO_BACKEND == 'local':
+            return get_store().models(rows, start)
+        return query(MODELS_QUERY, '?x ?title', rows, start)
+
+@ns.route('/graph/summary/')
+class ModelSummaryCollection(Resource):
+
+    @api.expect(parser)
+    @api.marshal_with(cam_summary)
+    def get(self):
+        """
+        Returns list of models with the number of activities in each
+
+        Counts are computed with one grouped query per chunk of
+        LEGO_COUNT_CHUNK_SIZE models, run concurrently within
+        LEGO_QUERY_TIMEOUT; counts of chunks that do not complete by
+        then are left empty and the response is flagged as partial
+        """
+        args = parser.parse_args()
+        (rows, start) = paging(args)
+        deadline = time.time() + settings.LEGO_QUERY_TIMEOUT
+
+        if settings.LEGO_BACKEND == 'local':
+            store = get_store()
+            models = store.models(rows, start)
+            count_models = store.activity_counts
+        else:
+            (results, failed) = fan_out_partial({'models': partial(query, MODELS_QUERY, '?x ?title', rows, start,
+                                                                   timeout=settings.LEGO_QUERY_TIMEOUT)},
+                                                settings.LEGO_QUERY_TIMEOUT)
+            if failed:
+                api.abort(504, 'Model query did not complete in time')
+            models = results['models']
+            count_models = lambda ids: activity_counts(ids, timeout=max(deadline - time.time(), 1))
+
+        summaries = []
+        for b in models['results']['bindings']:
+            summaries.append({
+                'id': b['x']['value'],
+                'title': b['title']['value'] if 'title' in b else None,
+            })
+        ids = [s['id'] for s in summaries]
+        size = settings.LEGO_COUNT_CHUNK_SIZE
+        chunks = {str(i): ids[i:i + size] for i in range(0, len(ids), size)}
+        remaining = max(deadline - time.time(), 0)
+        (results, failed) = fan_out_partial({name: partial(count_models, chunk) for (name, chunk) in chunks.items()},
+                                            remaining)
+        counts = {}
+        for r in results.values():
+            counts.update(r)
+        timed_out = set(id for name in failed for id in chunks[name])
+        for s in summaries:
+            s['activity_count'] = None if s['id'] in timed_out else counts.get(s['id'], 0)
+        return {
+            'models': summaries,
+            'partial': bool(failed),
+            'timed_out': [id for id in ids if id in timed_out],
+        }
 
 @ns.route('/graph/<id>')
 class Model(Resource):
@@ -83,13 +170,16 @@ class ActivityCollection(Resource):
         Returns list of models
         """
         args = parser.parse_args()
+        (rows, start) = paging(args)
+        if settings.LEGO_BACKEND == 'local':
+            return get_store().activities(rows, start)
         return query("""
         SELECT ?g ?a ?type WHERE 
         {?a a <http://purl.obolibrary.org/obo/GO_0003674> .
         GRAPH ?g {?a a ?type } .
         FILTER(?g != inferredG: && ?type != owl:NamedIndividual)
         }
-        """)
+        """, '?g ?a ?type', rows, start)
     
 @ns.route('/physical_interaction/')
 class PhysicalInteraction(Resource):
@@ -99,6 +189,10 @@ class PhysicalInteraction(Resource):
         """
         Returns list of models
         """
+        args = parser.parse_args()
+        (rows, start) = paging(args)
+        if settings.LEGO_BACKEND == 'local':
+            return get_store().physical_interactions(rows, start)
         return query("""
         SELECT * WHERE {
         GRAPH ?g {
@@ -113,6 +207,6 @@ class PhysicalInteraction(Resource):
         FILTER(?g != inferredG: && ?m1cls != ?m2cls && 
                ?m1cls != owl:NamedIndividual && ?m2cls != owl:NamedIndividual)
         }
-        """)
+        """, '?g ?a1 ?a2 ?arel ?m1 ?m2 ?a1cls ?a2cls ?m1cls ?m2cls', rows, start)
     
 
@@ -1,10 +1,13 @@
 import logging
+import json
 
-from flask import request
+from flask import request, Response, stream_with_context
 from flask_restplus import Resource
-from biolink.datamodel.serializers import association, association_results
+from biolink import settings
+from biolink.datamodel.serializers import association, association_results, association_batch_query
 from biolink.api.restplus import api
-from biolink.util.golr_associations import get_association, search_associations
+from biolink.util.golr_associations import get_association, search_associations, iter_associations, batch_search_associations
+from biolink.util.solr_client import is_transient
 import pysolr
 
 log = logging.getLogger(__name__)
@@ -20,6 +23,50 @@ parser.add_argument('graphize', type=bool, help='If set, includes graph object i
 parser.add_argument('exclude_evidence', type=bool, help='If set, excludes evidence objects in response')
 parser.add_argument('page', type=int, required=False, default=1, help='Page number')
 parser.add_argument('map_identifiers', help='Prefix to map all IDs to')
+# the response mask also determines which fields are fetched from solr
+parser.add_argument('X-Fields', location='headers', dest='mask', help='Response mask, e.g. {associations{id,subject}}')
+
+search_parser = parser.copy()
+search_parser.add_argument('facet_fields', action='append', help='Fields to facet on, e.g. subject_taxon_label. Faceting is off unless requested')
+search_parser.add_argument('facet_pivots', action='append', help='Comma-separated fields for a pivot facet, e.g. subject_category,object_category')
+search_parser.add_argument('facet_limit', type=int, help='Maximum number of values returned per facet')
+search_parser.add_argument('facet_mincount', type=int, help='Minimum count for a facet value to be returned')
+
+export_parser = parser.copy()
+export_parser.remove_argument('page')
+export_parser.add_argument('batch_size', type=int, required=False,
+                           help='Number of associations fetched from solr per round trip, at most {}'.format(settings.GOLR_EXPORT_BATCH_SIZE))
+
+def batch_query_args(body):
+    """
+    Returns the batch_search_associations arguments in a request body,
+    taking only the fields declared in association_batch_query
+    """
+    if not isinstance(body, dict):
+        api.abort(400, 'Request body must be a JSON object')
+    args = {k: body[k] for k in association_batch_query if body.get(k) is not None}
+    for k in ('subjects', 'objects'):
+        if k in args and not (isinstance(args[k], list) and all(isinstance(id, str) for id in args[k])):
+            api.abort(400, '{} must be a list of ids'.format(k))
+    rows = args.get('rows', 10)
+    if not isinstance(rows, int) or isinstance(rows, bool) or rows < 1:
+        api.abort(400, 'rows must be a positive integer')
+    args['rows'] = min(rows, settings.GOLR_BATCH_MAX_ROWS)
+    return args
+
+def export_lines(first, rest):
+    """
+    Yields associations as NDJSON lines; if solr fails part way through,
+    the last line is an {"error": ...} record, so a client can tell a
+    truncated export from a complete one
+    """
+    yield json.dumps(first.to_dict()) + "\n"
+    try:
+        for a in rest:
+            yield json.dumps(a.to_dict()) + "\n"
+    except Exception as e:
+        log.exception("Export failed part way through")
+        yield json.dumps({'error': 'Export incomplete: {}'.format(e)}) + "\n"
 
 @ns.route('/<id>')
 class AssociationObject(Resource):
@@ -32,7 +79,7 @@ class AssociationObject(Resource):
         """
         args = parser.parse_args()
 
-        return get_association(id)
+        return get_association(id, mask=args.get('mask'))
 
 
 @ns.route('/search/')
@@ -42,15 +89,62 @@ class AssociationObject(Resource):
 @api.doc(params={'object_category': 'CATEGORY of entity at link OBJECT (target), e.g. phenotype, disease'})
 class AssociationSearch(Resource):
 
-    @api.expect(parser)
+    @api.expect(search_parser)
     @api.marshal_list_with(association_results)
     def get(self, subject_category='gene', object_category='gene'):
         """
         Returns list of associations
         """
-        args = parser.parse_args()
+        args = search_parser.parse_args()
 
         return search_associations(subject_category, object_category, **args)
-    
-    
 
+@ns.route('/export/<subject_category>/<object_category>/')
+@api.doc(params={'subject_category': 'CATEGORY of entity at link SUBJECT (source), e.g. gene, disease, genotype'})
+@api.doc(params={'object_category': 'CATEGORY of entity at link OBJECT (target), e.g. phenotype, disease'})
+class AssociationExport(Resource):
+
+    @api.expect(export_parser)
+    def get(self, subject_category, object_category):
+        """
+        Streams all matching associations as newline-delimited JSON
+
+        Unlike search, this is not paged; results are written
+        incrementally as they are fetched from solr. If solr fails
+        after the first batch, the stream ends with an {"error": ...}
+        line
+        """
+        args = export_parser.parse_args()
+        batch_size = args['batch_size']
+        if batch_size is not None and not 1 <= batch_size <= settings.GOLR_EXPORT_BATCH_SIZE:
+            api.abort(400, 'batch_size must be between 1 and {}'.format(settings.GOLR_EXPORT_BATCH_SIZE))
+
+        assocs = iter_associations(subject_category, object_category, **args)
+        # fetch the first batch before sending the status line, so that
+        # a failing query is reported as an error rather than an empty 200
+        try:
+            first = next(assocs)
+        except StopIteration:
+            return Response('', mimetype='application/x-ndjson')
+        except pysolr.SolrError as e:
+            if is_transient(e):
+                raise
+            api.abort(400, 'Invalid query: {}'.format(e))
+        return Response(stream_with_context(export_lines(first, assocs)), mimetype='application/x-ndjson')
+
+@ns.route('/batch/')
+class AssociationBatchSearch(Resource):
+
+    @api.expect(association_batch_query)
+    def post(self):
+        """
+        Returns associations for many subjects or objects in one call
+
+        Either subjects or objects must be supplied (but not both);
+        results are keyed by each input id
+        """
+        args = batch_query_args(request.get_json(silent=True))
+        try:
+            return batch_search_associations(**args)
+        except ValueError as e:
+            api.abort(400, str(e))
@@ -2,34 +2,76 @@ import logging
 
 from flask import request
 from flask_restplus import Resource
-from biolink.datamodel.serializers import association
+from biolink.datamodel.serializers import enrichment_results, enrichment_query
 from biolink.api.restplus import api
-import pysolr
+from biolink.core.ontology.enrichment import CORRECTIONS
+from biolink.util.backgrounds import get_enrichment_engine, enrichment_backgrounds
 
 log = logging.getLogger(__name__)
 
-ns = api.namespace('ontol/enrichment', description='foo bar')
+ns = api.namespace('ontol/enrichment', description='Over-representation of ontology terms among a set of entities')
+
+# defaults are the first configured background
+(DEFAULT_ONTOLOGY, DEFAULT_SUBJECT_CATEGORY, DEFAULT_OBJECT_CATEGORY, DEFAULT_TAXON) = \
+    (enrichment_backgrounds() or [('go', 'gene', 'function', None)])[0]
 
 parser = api.parser()
-parser.add_argument('bioentity_ids', help='List of ids')
+parser.add_argument('bioentity_ids', action='append', help='Entity IDs to test, e.g. NCBIGene:84570. May be repeated')
+parser.add_argument('ontology', default=DEFAULT_ONTOLOGY, help='Ontology name, e.g. go, hp')
+parser.add_argument('subject_category', default=DEFAULT_SUBJECT_CATEGORY, help='Category of the input entities, e.g. gene')
+parser.add_argument('object_category', default=DEFAULT_OBJECT_CATEGORY, help='Category of the annotations, e.g. function, phenotype')
+parser.add_argument('taxon', default=DEFAULT_TAXON, help='Background taxon, e.g. NCBITaxon:9606; only configured backgrounds are available')
+parser.add_argument('max_p_value', type=float, default=0.05, help='Maximum corrected p-value of returned terms')
+parser.add_argument('correction', default='bonferroni', choices=CORRECTIONS, help='Multiple-testing correction')
 
-@ns.route('/')
-class Foo(Resource):
 
-    @api.expect(parser)
-    @api.marshal_list_with(association)
+def enrichment_response(args, subjects):
+    if args.get('correction') not in CORRECTIONS:
+        api.abort(400, 'correction must be one of {}'.format(', '.join(CORRECTIONS)))
+    max_p_value = args.get('max_p_value')
+    if isinstance(max_p_value, bool) or not isinstance(max_p_value, (int, float)) or not 0 <= max_p_value <= 1:
+        api.abort(400, 'max_p_value must be a number between 0 and 1')
+    try:
+        engine = get_enrichment_engine(args.get('ontology') or DEFAULT_ONTOLOGY,
+                                       args.get('subject_category') or DEFAULT_SUBJECT_CATEGORY,
+                                       args.get('object_category') or DEFAULT_OBJECT_CATEGORY,
+                                       args.get('taxon', DEFAULT_TAXON))
+    except KeyError:
+        supported = ['/'.join(str(v) for v in b) for b in enrichment_backgrounds()]
+        api.abort(400, 'Unsupported background; expected one of {} (ontology/subject_category/object_category/taxon)'.format(', '.join(supported)))
+    return engine.analyze(subjects,
+                          max_p_value=max_p_value,
+                          correction=args.get('correction'))
+
+
+@ns.route('/')
+class Enrichment(Resource):
 
     @api.expect(parser)
-    @api.marshal_list_with(association)
+    @api.marshal_with(enrichment_results)
     def get(self):
         """
-        Maps to slim
+        Terms over-represented among a set of entities
         """
         args = parser.parse_args()
 
-        return []
-
-
-    
-    
+        return enrichment_response(args, args['bioentity_ids'] or [])
 
+    @api.expect(enrichment_query)
+    @api.marshal_with(enrichment_results)
+    def post(self):
+        """
+        Terms over-represented among a (large) set of entities
+        """
+        query = request.get_json(silent=True)
+        if not isinstance(query, dict):
+            api.abort(400, 'Request body must be a JSON object')
+        args = {
+            'ontology': query.get('ontology'),
+            'subject_category': query.get('subject_category'),
+            'object_category': query.get('object_category'),
+            'taxon': query.get('taxon', DEFAULT_TAXON),
+            'max_p_value': query.get('max_p_value', 0.05),
+            'correction': query.get('correction') or 'bonferroni',
+        }
+        return enrichment_response(args, query.get('bioentity_ids') or [])
@@ -1,35 +1,79 @@
 import logging
 
 from flask import request
-from flask_restplus import Resource
-from biolink.datamodel.serializers import association
+from flask_restplus import Resource, inputs
+from biolink.datamodel.serializers import slim_results, slim_query
 from biolink.api.restplus import api
-import pysolr
+from biolink.core.ontology.compact_graph import subset_name
+from biolink.core.ontology.registry import get_slim_mapper, slim_subsets
 
 log = logging.getLogger(__name__)
 
-ns = api.namespace('ontol/slimmer', description='foo bar')
+ns = api.namespace('ontol/slimmer', description='Mapping of terms and annotations to ontology subsets (slims)')
 
 parser = api.parser()
-#parser.add_argument('subject_taxon', help='SUBJECT TAXON id, e.g. NCBITaxon:9606. Includes inferred by default')
+parser.add_argument('id', action='append', help='Term ID to map, e.g. GO:0005634. May be repeated')
+parser.add_argument('ontology', default='go', help='Ontology name, e.g. go, hp')
+parser.add_argument('minimal', type=inputs.boolean, default=True, help='If set, maps only to the most specific subset terms')
 
-@ns.route('/<subset>')
-class Foo(Resource):
 
-    @api.expect(parser)
-    @api.marshal_list_with(association)
+def slim_mapper(ontology, subset):
+    """
+    Returns the prebuilt SlimMapper for a subset, or aborts with a 404
+    if the subset is not configured
+    """
+    try:
+        return get_slim_mapper(ontology, subset_name(subset))
+    except KeyError:
+        supported = ['/'.join(s) for s in slim_subsets()]
+        api.abort(404, 'Unknown subset {} for ontology {}; expected one of {} (ontology/subset)'.format(
+            subset, ontology, ', '.join(supported)))
+
+
+def slim_response(ontology, subset, mappings):
+    return {
+        'ontology': ontology,
+        'subset': subset,
+        'mappings': [{'id': id, 'slim': slim} for (id, slim) in mappings.items()],
+    }
+
+
+@ns.route('/<subset>')
+@api.doc(params={'subset': 'subset name, e.g. goslim_generic'})
+class SlimMapping(Resource):
 
     @api.expect(parser)
-    @api.marshal_list_with(association)
+    @api.marshal_with(slim_results)
     def get(self, subset):
         """
-        Maps to slim
+        Maps terms to a subset
         """
         args = parser.parse_args()
+        mapper = slim_mapper(args['ontology'], subset)
 
-        return []
+        return slim_response(args['ontology'], subset, mapper.map_terms(args['id'] or [], args['minimal']))
 
+    @api.expect(slim_query)
+    @api.marshal_with(slim_results)
+    def post(self, subset):
+        """
+        Maps a batch of terms, or of annotations, to a subset in one pass
 
-    
-    
+        Annotations are mapped per subject: each subject is mapped to
+        the subset terms of all the terms it is annotated to
+        """
+        query = request.get_json(silent=True)
+        if not isinstance(query, dict):
+            api.abort(400, 'Request body must be a JSON object')
+        ontology = query.get('ontology') or 'go'
+        minimal = query.get('minimal', True) is not False
+        mapper = slim_mapper(ontology, subset)
 
+        if query.get('annotations'):
+            pairs = [(a.get('subject'), a.get('object')) for a in query['annotations'] if isinstance(a, dict)]
+            if len(pairs) != len(query['annotations']) or not all(s and o for (s, o) in pairs):
+                api.abort(400, 'Each annotation must have a subject and an object')
+            mappings = mapper.map_annotations(pairs, minimal)
+        else:
+            mappings = mapper.map_terms(query.get('ids') or [], minimal)
+        return slim_response(ontology, subset, mappings)
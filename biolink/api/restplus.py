@@ -3,6 +3,9 @@ import traceback
 
 from flask_restplus import Api
 from biolink import settings
+from biolink.util.solr_client import SolrUnavailable
+from biolink.util.graph_render import RenderBusy
+from biolink.core.ontology.registry import NotReady
 from sqlalchemy.orm.exc import NoResultFound
 
 log = logging.getLogger(__name__)
@@ -24,3 +27,21 @@ def default_error_handler(e):
 def database_not_found_error_handler(e):
     log.warning(traceback.format_exc())
     return {'message': 'A database result was required but none was found.'}, 404
+
+
+@api.errorhandler(SolrUnavailable)
+def solr_unavailable_error_handler(e):
+    log.warning(str(e))
+    return {'message': 'The search backend is temporarily unavailable.'}, 503
+
+
+@api.errorhandler(RenderBusy)
+def render_busy_error_handler(e):
+    log.warning(str(e))
+    return {'message': 'Image rendering is temporarily unavailable.'}, 503
+
+
+@api.errorhandler(NotReady)
+def not_ready_error_handler(e):
+    log.warning(str(e))
+    return {'message': 'This resource is still being built; try again later.'}, 503
@@ -1,12 +1,15 @@
 import logging
 
-from flask_restplus import reqparse
+from flask_restplus import reqparse, inputs
 from flask import request
 from flask_restplus import Resource
 from biolink.api.variation.business import create_variantset, update_variantset, delete_variantset
 from biolink.datamodel.serializers import association
 from biolink.api.restplus import api
 from biolink.database.models import VariantSet
+from biolink.database.pagination import keyset_paginate, offset_paginate
+from biolink.database.loading import eager_load
+from biolink import settings
 import pysolr
 
 log = logging.getLogger(__name__)
@@ -18,6 +21,9 @@ pagination_arguments.add_argument('page', type=int, required=False, default=1, h
 pagination_arguments.add_argument('bool', type=bool, required=False, default=1, help='Page number')
 pagination_arguments.add_argument('per_page', type=int, required=False, choices=[2, 10, 20, 30, 40, 50],
                                   default=10, help='Results per page {error_msg}')
+pagination_arguments.add_argument('cursor', required=False, help='Cursor from next_cursor of the previous page; takes precedence over page')
+pagination_arguments.add_argument('count', type=inputs.boolean, required=False, default=True,
+                                  help='If false, skips counting the total number of results')
 
 # transient data model
 
@@ -32,10 +38,12 @@ variantset = api.model('variant set', {
 })
 
 pagination = api.model('A page of results', {
-    'page': fields.Integer(description='Number of this page of results'),
+    'page': fields.Integer(description='Number of this page of results; null for pages requested by cursor'),
     'pages': fields.Integer(description='Total number of pages of results'),
     'per_page': fields.Integer(description='Number of items per page of results'),
     'total': fields.Integer(description='Total number of results'),
+    'cursor': fields.String(description='Cursor this page was requested with, if any'),
+    'next_cursor': fields.String(description='Cursor for the next page; absent on the last page'),
 })
 
 page_of_variantsets = api.inherit('Page of variant sets', pagination, {
@@ -43,6 +51,35 @@ page_of_variantsets = api.inherit('Page of variant sets', pagination, {
 })
 
 
+def variantset_query():
+    """
+    Base query for variant sets; loads the category marshalled with
+    each row up front, so a page costs a constant number of queries
+    rather than one more per row
+    """
+    return eager_load(VariantSet.query, settings.VARIATION_EAGER_LOADING, VariantSet.category)
+
+
+def paginate(query, args):
+    """
+    Returns a page of variant sets
+
+    Pages are fetched by keyset on (pub_date, id), starting from the
+    cursor, so deep pages cost the same as the first. Explicit page
+    numbers beyond the first still use OFFSET paging.
+    """
+    page = args.get('page') or 1
+    per_page = args.get('per_page') or 10
+    cursor = args.get('cursor')
+    columns = (VariantSet.pub_date, VariantSet.id)
+    if page > 1 and not cursor:
+        return offset_paginate(query, columns, page, per_page, count=args.get('count'))
+    try:
+        return keyset_paginate(query, columns, per_page, cursor=cursor, count=args.get('count'))
+    except ValueError as e:
+        api.abort(400, str(e))
+
+
 @ns.route('/')
 class VariantSetsCollection(Resource):
 
@@ -53,13 +90,9 @@ class VariantSetsCollection(Resource):
         Returns list of variant sets.
         """
         args = pagination_arguments.parse_args(request)
-        page = args.get('page', 1)
-        per_page = args.get('per_page', 10)
-
-        posts_query = VariantSet.query
-        posts_page = posts_query.paginate(page, per_page, error_out=False)
 
-        return posts_page
+        posts_query = variantset_query()
+        return paginate(posts_query, args)
 
     @api.expect(variantset)
     def post(self):
@@ -79,7 +112,7 @@ class VariantSetItem(Resource):
         """
         Returns a variant set.
         """
-        return VariantSet.query.filter(VariantSet.id == id).one()
+        return variantset_query().filter(VariantSet.id == id).one()
 
     @api.expect(variantset)
     @api.response(204, 'VariantSet successfully updated.')
@@ -112,8 +145,6 @@ class VariantSetsArchiveCollection(Resource):
         Returns list of variant sets from a specified time period.
         """
         args = pagination_arguments.parse_args(request)
-        page = args.get('page', 1)
-        per_page = args.get('per_page', 10)
 
         start_month = month if month else 1
         end_month = month if month else 12
@@ -121,11 +152,9 @@ class VariantSetsArchiveCollection(Resource):
         end_day = day + 1 if day else 31
         start_date = '{0:04d}-{1:02d}-{2:02d}'.format(year, start_month, start_day)
         end_date = '{0:04d}-{1:02d}-{2:02d}'.format(year, end_month, end_day)
-        posts_query = VariantSet.query.filter(VariantSet.pub_date >= start_date).filter(VariantSet.pub_date <= end_date)
-
-        posts_page = posts_query.paginate(page, per_page, error_out=False)
+        posts_query = variantset_query().filter(VariantSet.pub_date >= start_date).filter(VariantSet.pub_date <= end_date)
 
-        return posts_page
+        return paginate(posts_query, args)
 
 @ns.route('/analyze/<id>')
 class Analyze(Resource):
@@ -21,6 +21,9 @@ from biolink.api.variation.endpoints.variantset import ns as variation_variantse
 from biolink.api.restplus import api
 
 from biolink.database import db
+from biolink.util import graph_render, prebuild
+from biolink.core.lego.store import get_store
+from biolink.datamodel.association import AssociationJSONEncoder
 
 app = Flask(__name__)
 logging.config.fileConfig('logging.conf')
@@ -35,6 +38,8 @@ def configure_app(flask_app):
     flask_app.config['RESTPLUS_VALIDATE'] = settings.RESTPLUS_VALIDATE
     flask_app.config['RESTPLUS_MASK_SWAGGER'] = settings.RESTPLUS_MASK_SWAGGER
     flask_app.config['ERROR_404_HELP'] = settings.RESTPLUS_ERROR_404_HELP
+    # association objects in responses that are not marshalled
+    flask_app.config['RESTPLUS_JSON'] = {'cls': AssociationJSONEncoder}
 
 
 def initialize_app(flask_app):
@@ -46,6 +51,13 @@ def initialize_app(flask_app):
     flask_app.register_blueprint(blueprint)
 
     db.init_app(flask_app)
+    graph_render.start()
+    if settings.LEGO_BACKEND == 'local':
+        # fail now, rather than in every CAM request, if the store is missing
+        get_store()
+
+    if settings.PREBUILD_ON_STARTUP:
+        prebuild.start()
 
 
 def main():
@@ -1,3 +1,90 @@
+import logging
+import math
+
 from SPARQLWrapper import SPARQLWrapper, JSON
 
-sparql = SPARQLWrapper("http://rdf.geneontology.org/sparql")
+from biolink import settings
+from biolink.util.cache import cached_call, make_cache
+from biolink.util.singleflight import SingleFlight
+
+log = logging.getLogger(__name__)
+
+PREFIXES = """
+prefix directly_activates: <http://purl.obolibrary.org/obo/RO_0002406>
+prefix directly_positively_regulates: <http://purl.obolibrary.org/obo/RO_0002629>
+prefix enabled_by: <http://purl.obolibrary.org/obo/RO_0002333>
+prefix inferredG: <http://geneontology.org/rdf/inferred/>
+"""
+
+
+cache = make_cache(settings.LEGO_CACHE_MAX_ENTRIES,
+                   settings.LEGO_CACHE_MAX_BYTES,
+                   settings.LEGO_CACHE_TTL)
+inflight = SingleFlight()
+
+
+def new_client(timeout=None):
+    """
+    Returns a new SPARQLWrapper; wrappers hold per-query state, so
+    each call gets its own rather than sharing one across threads.
+
+    Queries are abandoned after timeout seconds (default
+    LEGO_QUERY_TIMEOUT) rather than blocking a worker indefinitely.
+    """
+    client = SPARQLWrapper(settings.LEGO_SPARQL_URL)
+    client.setReturnFormat(JSON)
+    client.setTimeout(int(math.ceil(timeout or settings.LEGO_QUERY_TIMEOUT)))
+    return client
+
+
+def run_query(q, timeout=None):
+    """
+    Runs a complete SPARQL query, returning SPARQL JSON results; results
+    are cached by query text
+    """
+    return cached_call(cache, inflight, q, lambda: _execute(q, timeout))
+
+
+def _execute(q, timeout=None):
+    client = new_client(timeout)
+    client.setQuery(q)
+    return client.query().convert()
+
+
+def query(q, order_by, rows=10, start=0, timeout=None):
+    """
+    Runs a SELECT query, returning rows results from offset start in
+    SPARQL JSON form.
+
+    Results are ordered by order_by (e.g. '?g ?a') so that pages are
+    stable, and fetched in fixed blocks of LEGO_BLOCK_SIZE rows with
+    LIMIT/OFFSET. Each block is cached, so an expensive query is run
+    once per block and any page within it is a slice of cached results.
+    """
+    block_size = settings.LEGO_BLOCK_SIZE
+    first = start // block_size
+    last = (start + max(rows, 1) - 1) // block_size
+    head = None
+    bindings = []
+    for b in range(first, last + 1):
+        text = "{}{}\nORDER BY {}\nLIMIT {} OFFSET {}".format(PREFIXES, q, order_by, block_size, b * block_size)
+        results = run_query(text, timeout)
+        head = results['head']
+        block = results['results']['bindings']
+        bindings += block
+        if len(block) < block_size:
+            break
+    offset = start - first * block_size
+    return {
+        'head': head,
+        'results': {'bindings': bindings[offset:offset + rows]},
+    }
+
+
+def grouped_counts(q, key, timeout=None):
+    """
+    Runs a query selecting a ?n count for each value of the variable
+    key, returning a dict of value to count
+    """
+    results = run_query(PREFIXES + q, timeout)
+    return {b[key]['value']: int(b['n']['value']) for b in results['results']['bindings']}
@@ -0,0 +1,248 @@
+"""
+Local, indexed store of GO-CAM models
+
+Models are ingested offline from GO-CAM files (e.g. the turtle files
+in the noctua-models repository) into a sqlite database:
+
+    python -m biolink.core.lego.store models.sqlite models/*.ttl
+
+The CAM endpoints can then be answered from the store with indexed
+lookups instead of the remote SPARQL endpoint (see LEGO_BACKEND in
+settings). Results use the SPARQL JSON results form, with the same
+variables as the corresponding SPARQL queries.
+
+Results can differ from the SPARQL backend in one respect: the store
+has no reasoner, so an activity is an individual with an enabled_by
+edge, whereas the SPARQL queries select individuals inferred to be
+molecular functions (GO:0003674). Activities with no enabled_by edge
+are therefore missing from the store, and enabled_by subjects that are
+not molecular functions are included.
+"""
+import argparse
+import logging
+import sqlite3
+import threading
+from urllib.request import pathname2url
+
+from biolink import settings
+
+log = logging.getLogger(__name__)
+
+ENABLED_BY = 'http://purl.obolibrary.org/obo/RO_0002333'
+OWL_ONTOLOGY = 'http://www.w3.org/2002/07/owl#Ontology'
+OWL_NAMED_INDIVIDUAL = 'http://www.w3.org/2002/07/owl#NamedIndividual'
+DC_TITLE = 'http://purl.org/dc/elements/1.1/title'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS model (
+    id TEXT PRIMARY KEY,
+    title TEXT
+);
+CREATE TABLE IF NOT EXISTS individual_type (
+    model TEXT NOT NULL,
+    individual TEXT NOT NULL,
+    type TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS individual_type_individual ON individual_type (individual);
+-- activity -> enabled_by -> gene product
+CREATE TABLE IF NOT EXISTS activity (
+    model TEXT NOT NULL,
+    activity TEXT NOT NULL,
+    gene_product TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS activity_model ON activity (model, activity);
+CREATE INDEX IF NOT EXISTS activity_activity ON activity (activity);
+-- edges between activities, e.g. causal relations
+CREATE TABLE IF NOT EXISTS activity_edge (
+    model TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    relation TEXT NOT NULL,
+    object TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS activity_edge_model ON activity_edge (model, subject);
+CREATE INDEX IF NOT EXISTS activity_edge_object ON activity_edge (object);
+"""
+
+
+def uri(value):
+    return {'type': 'uri', 'value': value}
+
+
+def literal(value):
+    return {'type': 'literal', 'value': value}
+
+
+def sparql_results(vars, kinds, rows):
+    """
+    Returns rows (tuples) in SPARQL JSON results form; kinds gives the
+    binding function (uri or literal) for each variable
+    """
+    bindings = []
+    for row in rows:
+        bindings.append({v: kind(value) for (v, kind, value) in zip(vars, kinds, row) if value is not None})
+    return {'head': {'vars': list(vars)}, 'results': {'bindings': bindings}}
+
+
+class ModelStore:
+    """
+    sqlite-backed GO-CAM model store; safe to share between threads,
+    as each thread gets its own connection
+    """
+
+    def __init__(self, path, read_only=False):
+        self.path = path
+        self.read_only = read_only
+        self._local = threading.local()
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.read_only:
+                # unlike a plain connect, fails if the file does not exist
+                conn = sqlite3.connect('file:{}?mode=ro'.format(pathname2url(self.path)), uri=True)
+            else:
+                conn = sqlite3.connect(self.path)
+            self._local.conn = conn
+        return conn
+
+    def check(self):
+        """
+        Raises ValueError unless the store exists and has been created
+        """
+        try:
+            self.connection().execute('SELECT COUNT(*) FROM model').fetchone()
+        except sqlite3.Error as e:
+            raise ValueError('Not a GO-CAM model store: {} ({})'.format(self.path, e))
+
+    def create(self):
+        self.connection().executescript(SCHEMA)
+
+    def ingest(self, fn, format=None):
+        """
+        Loads one GO-CAM model file, replacing any earlier version of
+        the same model; requires rdflib
+        """
+        import rdflib
+        from rdflib.util import guess_format
+
+        g = rdflib.Graph()
+        g.parse(fn, format=format or guess_format(fn) or 'turtle')
+        models = list(g.subjects(rdflib.RDF.type, rdflib.URIRef(OWL_ONTOLOGY)))
+        if len(models) != 1:
+            raise ValueError('Expected one model (owl:Ontology) in {}, found {}'.format(fn, len(models)))
+        model = str(models[0])
+        title = g.value(models[0], rdflib.URIRef(DC_TITLE))
+
+        types = [(model, str(s), str(o)) for (s, o) in g.subject_objects(rdflib.RDF.type)
+                 if isinstance(s, rdflib.URIRef) and isinstance(o, rdflib.URIRef)
+                 and str(o) not in (OWL_NAMED_INDIVIDUAL, OWL_ONTOLOGY)]
+        activities = [(model, str(a), str(m)) for (a, m) in g.subject_objects(rdflib.URIRef(ENABLED_BY))]
+        activity_ids = set(a for (_, a, _) in activities)
+        edges = [(model, str(s), str(p), str(o)) for (s, p, o) in g
+                 if str(s) in activity_ids and str(o) in activity_ids]
+
+        conn = self.connection()
+        with conn:
+            for table in ('model', 'individual_type', 'activity', 'activity_edge'):
+                column = 'id' if table == 'model' else 'model'
+                conn.execute('DELETE FROM {} WHERE {} = ?'.format(table, column), (model,))
+            conn.execute('INSERT INTO model VALUES (?, ?)', (model, str(title) if title is not None else None))
+            conn.executemany('INSERT INTO individual_type VALUES (?, ?, ?)', types)
+            conn.executemany('INSERT INTO activity VALUES (?, ?, ?)', activities)
+            conn.executemany('INSERT INTO activity_edge VALUES (?, ?, ?, ?)', edges)
+        return model
+
+    def _select(self, sql, params, rows, start):
+        return self.connection().execute(sql + ' LIMIT ? OFFSET ?', tuple(params) + (rows, start)).fetchall()
+
+    def models(self, rows=10, start=0):
+        """
+        Models and their titles, as ?x ?title
+        """
+        result = self._select('SELECT id, title FROM model ORDER BY id, title', (), rows, start)
+        return sparql_results(('x', 'title'), (uri, literal), result)
+
+    def activities(self, rows=10, start=0):
+        """
+        Activities and their asserted types, as ?g ?a ?type
+        """
+        result = self._select("""
+            SELECT DISTINCT a.model, a.activity, t.type
+            FROM activity a
+            JOIN individual_type t ON t.individual = a.activity AND t.model = a.model
+            ORDER BY a.model, a.activity, t.type""", (), rows, start)
+        return sparql_results(('g', 'a', 'type'), (uri, uri, uri), result)
+
+    def activity_counts(self, models):
+        """
+        Number of distinct activities in each of a list of models, as a
+        dict; models without activities are omitted
+        """
+        counts = {}
+        # stay under sqlite's limit on the number of query parameters
+        for i in range(0, len(models), 500):
+            chunk = models[i:i + 500]
+            counts.update(self.connection().execute("""
+                SELECT model, COUNT(DISTINCT activity) FROM activity
+                WHERE model IN ({}) GROUP BY model""".format(','.join('?' * len(chunk))), chunk))
+        return counts
+
+    def physical_interactions(self, rows=10, start=0):
+        """
+        Pairs of connected activities enabled by gene products of
+        different types, with the same variables as the SPARQL query
+        """
+        result = self._select("""
+            SELECT DISTINCT e.model, e.subject, e.object, e.relation, a1.gene_product, a2.gene_product,
+                   t1.type, t2.type, m1.type, m2.type
+            FROM activity_edge e
+            JOIN activity a1 ON a1.model = e.model AND a1.activity = e.subject
+            JOIN activity a2 ON a2.model = e.model AND a2.activity = e.object
+            JOIN individual_type t1 ON t1.model = e.model AND t1.individual = e.subject
+            JOIN individual_type t2 ON t2.model = e.model AND t2.individual = e.object
+            JOIN individual_type m1 ON m1.model = e.model AND m1.individual = a1.gene_product
+            JOIN individual_type m2 ON m2.model = e.model AND m2.individual = a2.gene_product
+            WHERE m1.type != m2.type
+            ORDER BY e.model, e.subject, e.object, e.relation, a1.gene_product, a2.gene_product,
+                     t1.type, t2.type, m1.type, m2.type""", (), rows, start)
+        vars = ('g', 'a1', 'a2', 'arel', 'm1', 'm2', 'a1cls', 'a2cls', 'm1cls', 'm2cls')
+        return sparql_results(vars, (uri,) * len(vars), result)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Returns the shared, read-only ModelStore at settings.LEGO_STORE_PATH;
+    raises ValueError if there is no store there
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            store = ModelStore(settings.LEGO_STORE_PATH, read_only=True)
+            store.check()
+            _store = store
+        return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Loads GO-CAM model files into a local model store')
+    parser.add_argument('store', help='sqlite database to create or update')
+    parser.add_argument('files', nargs='+', help='GO-CAM model files, e.g. turtle')
+    parser.add_argument('--format', help='rdf format, if not guessed from the file extension')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = ModelStore(args.store)
+    store.create()
+    for fn in args.files:
+        try:
+            log.info("Loaded {}".format(store.ingest(fn, args.format)))
+        except Exception:
+            log.exception("Could not load {}".format(fn))
+
+
+if __name__ == '__main__':
+    main()
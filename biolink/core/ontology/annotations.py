@@ -0,0 +1,90 @@
+import numpy as np
+
+from biolink.core.ontology.compact_graph import gather, to_csr
+
+
+class AnnotationMatrix:
+    """
+    Sparse subject x term annotation matrix, e.g. genes x GO terms.
+
+    Stored as CSR rows of sorted term indices (indexing the ontology's
+    CompactGraph) per subject. When built with a closure, annotations
+    are propagated up the ontology, so a subject is annotated to every
+    ancestor of its direct terms.
+    """
+
+    def __init__(self, graph, subjects, indptr, indices):
+        self.graph = graph
+        self.subjects = subjects
+        self.subject_index = {s: i for (i, s) in enumerate(subjects)}
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_pairs(cls, pairs, closure):
+        """
+        Builds a matrix from (subject, term) pairs, propagating each
+        term to its ancestors in closure. Terms not in the ontology
+        are dropped.
+        """
+        graph = closure.graph
+        subjects = []
+        subject_index = {}
+        srows = []
+        tcols = []
+        for (s, t) in pairs:
+            ti = graph.index.get(t)
+            if ti is None:
+                continue
+            si = subject_index.get(s)
+            if si is None:
+                si = len(subjects)
+                subject_index[s] = si
+                subjects.append(s)
+            srows.append(si)
+            tcols.append(ti)
+        srows = np.array(srows, dtype=np.int64)
+        tcols = np.array(tcols, dtype=np.int64)
+
+        # add the ancestors of each directly annotated term
+        counts = closure.anc_indptr[tcols + 1] - closure.anc_indptr[tcols]
+        ancs = gather(closure.anc_indptr, closure.anc_indices, tcols)
+        srows = np.concatenate([srows, np.repeat(srows, counts)])
+        tcols = np.concatenate([tcols, ancs])
+
+        n_terms = len(graph)
+        keys = np.unique(srows * n_terms + tcols)
+        (indptr, indices) = to_csr(len(subjects), keys // n_terms, keys % n_terms)
+        return cls(graph, subjects, indptr, indices)
+
+    def __len__(self):
+        return len(self.subjects)
+
+    def subject_indices(self, subjects):
+        """
+        Returns (indices, unmatched) for a list of subject IDs
+        """
+        found = []
+        unmatched = []
+        for s in subjects:
+            i = self.subject_index.get(s)
+            if i is None:
+                unmatched.append(s)
+            else:
+                found.append(i)
+        return (np.unique(np.array(found, dtype=np.int64)), unmatched)
+
+    def term_counts(self, subject_indices=None):
+        """
+        Number of subjects annotated to each term, over all subjects
+        or over a subset of them
+        """
+        if subject_indices is None:
+            terms = self.indices
+        else:
+            terms = gather(self.indptr, self.indices, np.asarray(subject_indices, dtype=np.int64))
+        return np.bincount(terms, minlength=len(self.graph))
+
+    def terms(self, subject):
+        i = self.subject_index[subject]
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
@@ -0,0 +1,136 @@
+from collections import deque
+
+import numpy as np
+
+from biolink.core.ontology.compact_graph import gather, to_csr
+
+IS_A = 'is_a'
+PART_OF = 'http://purl.obolibrary.org/obo/BFO_0000050'
+
+# relations followed when computing closures unless told otherwise
+DEFAULT_PREDICATES = (IS_A, PART_OF)
+
+
+class ClosureIndex:
+    """
+    Precomputed reflexive-transitive closure of a CompactGraph over a
+    set of relations, e.g. is_a+part_of.
+
+    Ancestors and descendants of every node are stored as sorted rows
+    of a CSR array, computed once in topological order, so closure
+    enumeration is a slice and a subsumption check is a binary search
+    within a row (a handful of comparisons for real ontologies) rather
+    than a graph walk.
+
+    Stored rows are non-reflexive; the query methods add the node
+    itself where reflexive is set.
+    """
+
+    def __init__(self, graph, predicates=DEFAULT_PREDICATES):
+        self.graph = graph
+        self.predicates = tuple(p for p in predicates if p in graph.out_csr)
+        n = len(graph)
+        (self.parent_indptr, self.parent_indices) = self._parents(n)
+        ancs = self._compute_ancestors(n)
+        counts = np.array([len(a) for a in ancs], dtype=np.int64)
+        self.anc_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.anc_indptr[1:])
+        self.anc_indices = np.concatenate(ancs).astype(np.int32) if n else np.empty(0, dtype=np.int32)
+        # invert: each (node, ancestor) pair is a (ancestor, descendant) pair;
+        # rows come out sorted because nodes are visited in index order
+        nodes = np.repeat(np.arange(n, dtype=np.int32), counts)
+        (self.desc_indptr, self.desc_indices) = to_csr(n, self.anc_indices, nodes)
+
+    def _parents(self, n):
+        rows = []
+        cols = []
+        for p in self.predicates:
+            (indptr, indices) = self.graph.out_csr[p]
+            rows.append(np.repeat(np.arange(n, dtype=np.int32), np.diff(indptr)))
+            cols.append(np.asarray(indices))
+        if not rows:
+            return (np.zeros(n + 1, dtype=np.int64), np.empty(0, dtype=np.int32))
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols)
+        # drop duplicate edges (e.g. both is_a and part_of) and self loops
+        keep = rows != cols
+        pairs = np.unique(np.stack([rows[keep], cols[keep]], axis=1), axis=0) if keep.any() else np.empty((0, 2), dtype=np.int32)
+        return to_csr(n, pairs[:, 0], pairs[:, 1])
+
+    def _compute_ancestors(self, n):
+        indptr = self.parent_indptr
+        indices = self.parent_indices
+        empty = np.empty(0, dtype=np.int32)
+        ancs = [None] * n
+        # Kahn's algorithm from the roots down: a node is ready once
+        # the ancestors of all its parents are known
+        pending = np.diff(indptr).astype(np.int64)
+        (child_indptr, child_indices) = to_csr(n, indices, np.repeat(np.arange(n, dtype=np.int32), np.diff(indptr)))
+        queue = deque(np.flatnonzero(pending == 0).tolist())
+        while queue:
+            i = queue.popleft()
+            parents = indices[indptr[i]:indptr[i + 1]]
+            if len(parents):
+                ancs[i] = np.unique(np.concatenate([parents] + [ancs[p] for p in parents]))
+            else:
+                ancs[i] = empty
+            for c in child_indices[child_indptr[i]:child_indptr[i + 1]]:
+                pending[c] -= 1
+                if pending[c] == 0:
+                    queue.append(c)
+        # nodes on or below a cycle never become ready; walk those directly
+        for i in range(n):
+            if ancs[i] is None:
+                ancs[i] = self._walk(i)
+        return ancs
+
+    def _walk(self, i):
+        n = len(self.graph)
+        visited = np.zeros(n, dtype=bool)
+        frontier = np.array([i])
+        while len(frontier):
+            nxt = gather(self.parent_indptr, self.parent_indices, frontier)
+            nxt = nxt[~visited[nxt]]
+            visited[nxt] = True
+            frontier = nxt.astype(np.int64)
+        visited[i] = False
+        return np.flatnonzero(visited).astype(np.int32)
+
+    def ancestor_indices(self, i, reflexive=False):
+        row = self.anc_indices[self.anc_indptr[i]:self.anc_indptr[i + 1]]
+        if reflexive:
+            return np.insert(row, np.searchsorted(row, i), i)
+        return row
+
+    def descendant_indices(self, i, reflexive=False):
+        row = self.desc_indices[self.desc_indptr[i]:self.desc_indptr[i + 1]]
+        if reflexive:
+            return np.insert(row, np.searchsorted(row, i), i)
+        return row
+
+    def ancestors(self, id, reflexive=False):
+        ids = self.graph.ids
+        return [ids[j] for j in self.ancestor_indices(self.graph.index[id], reflexive)]
+
+    def descendants(self, id, reflexive=False):
+        ids = self.graph.ids
+        return [ids[j] for j in self.descendant_indices(self.graph.index[id], reflexive)]
+
+    def is_ancestor_index(self, a, d, reflexive=True):
+        if a == d:
+            return reflexive
+        row = self.anc_indices[self.anc_indptr[d]:self.anc_indptr[d + 1]]
+        k = np.searchsorted(row, a)
+        return k < len(row) and row[k] == a
+
+    def subsumes(self, parent, child, reflexive=True):
+        """
+        True if parent is an ancestor of child over the indexed relations
+        """
+        index = self.graph.index
+        if parent not in index or child not in index:
+            return False
+        return bool(self.is_ancestor_index(index[parent], index[child], reflexive))
+
+    def closure_size(self):
+        return len(self.anc_indices)
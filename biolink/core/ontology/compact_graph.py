@@ -0,0 +1,222 @@
+from array import array
+
+import networkx
+import numpy as np
+
+
+def subset_name(s):
+    """
+    Short name for a subset, e.g. goslim_generic for
+    http://purl.obolibrary.org/obo/go#goslim_generic
+    """
+    for sep in ['#', '/']:
+        if sep in s:
+            s = s.rsplit(sep, 1)[1]
+    return s
+
+
+def gather(indptr, indices, nodes):
+    """
+    Returns the concatenated CSR rows for an array of nodes, without a
+    python-level loop over the nodes
+    """
+    starts = indptr[nodes]
+    lens = indptr[nodes + 1] - starts
+    total = int(lens.sum())
+    if total == 0:
+        return np.empty(0, dtype=indices.dtype)
+    # offset of each output slot within its row, added to the row start
+    row_offsets = np.repeat(np.cumsum(lens) - lens, lens)
+    return indices[np.repeat(starts, lens) + np.arange(total) - row_offsets]
+
+
+def to_csr(n, rows, cols):
+    """
+    Builds (indptr, indices) for edges rows[i] -> cols[i] over n nodes
+    """
+    order = np.argsort(rows, kind='stable')
+    indices = cols[order].astype(np.int32)
+    counts = np.bincount(rows, minlength=n)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return (indptr, indices)
+
+
+class CompactGraph:
+    """
+    Memory-compact, read-only ontology graph.
+
+    Nodes are numbered 0..n-1; edges are stored per predicate as CSR
+    adjacency arrays in both directions (sub->obj and obj->sub), so
+    traversals run over numpy arrays rather than per-node dicts. Only
+    the node attributes needed by the API are kept: label, subsets
+    and synonyms.
+
+    Edges point from subject to object, so for is_a edges successors
+    are parents and predecessors are children.
+    """
+
+    def __init__(self, ids, labels, predicates, out_csr, in_csr, subsets=None, synonyms=None):
+        self.ids = ids
+        self.labels = labels
+        self.predicates = predicates
+        self.out_csr = out_csr  # predicate -> (indptr, indices)
+        self.in_csr = in_csr
+        self.subsets = subsets or {}  # subset name -> sorted node index array
+        self.synonyms = synonyms or {}  # node index -> list of synonyms
+        self.index = {id: i for (i, id) in enumerate(ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id):
+        return id in self.index
+
+    def node_index(self, id):
+        return self.index[id]
+
+    def label(self, id):
+        return self.labels[self.index[id]]
+
+    def number_of_edges(self):
+        return sum(len(indices) for (_, indices) in self.out_csr.values())
+
+    def _predicates(self, preds):
+        if preds is None:
+            return list(self.predicates)
+        return [p for p in preds if p in self.out_csr]
+
+    def _neighbors(self, csr, nodes, preds):
+        parts = [gather(csr[p][0], csr[p][1], nodes) for p in self._predicates(preds)]
+        if not parts:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(parts))
+
+    def _closure(self, csr, start, preds):
+        n = len(self.ids)
+        visited = np.zeros(n, dtype=bool)
+        frontier = np.asarray(start, dtype=np.int64)
+        while len(frontier):
+            nxt = self._neighbors(csr, frontier, preds)
+            nxt = nxt[~visited[nxt]]
+            visited[nxt] = True
+            frontier = nxt.astype(np.int64)
+        return np.flatnonzero(visited)
+
+    def successor_indices(self, i, preds=None):
+        return self._neighbors(self.out_csr, np.array([i]), preds)
+
+    def predecessor_indices(self, i, preds=None):
+        return self._neighbors(self.in_csr, np.array([i]), preds)
+
+    def ancestor_indices(self, i, preds=None):
+        return self._closure(self.out_csr, [i], preds)
+
+    def descendant_indices(self, i, preds=None):
+        return self._closure(self.in_csr, [i], preds)
+
+    def successors(self, id, preds=None):
+        return [self.ids[j] for j in self.successor_indices(self.index[id], preds)]
+
+    def predecessors(self, id, preds=None):
+        return [self.ids[j] for j in self.predecessor_indices(self.index[id], preds)]
+
+    def ancestors(self, id, preds=None):
+        """
+        Returns IDs of all nodes reachable from id via preds (default: all)
+        """
+        return [self.ids[j] for j in self.ancestor_indices(self.index[id], preds)]
+
+    def descendants(self, id, preds=None):
+        return [self.ids[j] for j in self.descendant_indices(self.index[id], preds)]
+
+    def edges(self):
+        """
+        Generator over (sub, pred, obj) ID triples
+        """
+        for (p, (indptr, indices)) in self.out_csr.items():
+            counts = np.diff(indptr)
+            subs = np.repeat(np.arange(len(self.ids)), counts)
+            for (s, o) in zip(subs, indices):
+                yield (self.ids[s], p, self.ids[o])
+
+    def to_networkx(self):
+        """
+        Returns the equivalent networkx MultiDiGraph, in the form
+        produced by obograph_util.convert_json_object
+        """
+        digraph = networkx.MultiDiGraph()
+        for (i, id) in enumerate(self.ids):
+            digraph.add_node(id, id=id, lbl=self.labels[i])
+        for (s, p, o) in self.edges():
+            digraph.add_edge(s, o, pred=p)
+        return digraph
+
+
+class CompactGraphBuilder:
+    """
+    Accumulates nodes and edges, then freezes them into a CompactGraph
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.index = {}
+        self.labels = []
+        self.predicates = []
+        self.pred_index = {}
+        self.subs = array('i')
+        self.objs = array('i')
+        self.preds = array('i')
+        self.subsets = {}
+        self.synonyms = {}
+
+    def node_index(self, id):
+        i = self.index.get(id)
+        if i is None:
+            i = len(self.ids)
+            self.index[id] = i
+            self.ids.append(id)
+            self.labels.append(None)
+        return i
+
+    def add_node(self, id, label=None, subsets=None, synonyms=None):
+        i = self.node_index(id)
+        if label is not None:
+            self.labels[i] = label
+        for s in subsets or []:
+            self.subsets.setdefault(subset_name(s), array('i')).append(i)
+        if synonyms:
+            self.synonyms.setdefault(i, []).extend(synonyms)
+        return i
+
+    def add_edge(self, sub, pred, obj):
+        p = self.pred_index.get(pred)
+        if p is None:
+            p = len(self.predicates)
+            self.pred_index[pred] = p
+            self.predicates.append(pred)
+        self.subs.append(self.node_index(sub))
+        self.objs.append(self.node_index(obj))
+        self.preds.append(p)
+
+    def build(self, dedupe_edges=False):
+        """
+        Freezes the graph; if dedupe_edges is set, edges added more than
+        once (e.g. when merging overlapping graphs) are kept only once
+        """
+        n = len(self.ids)
+        subs = np.frombuffer(self.subs, dtype=np.int32) if len(self.subs) else np.empty(0, dtype=np.int32)
+        objs = np.frombuffer(self.objs, dtype=np.int32) if len(self.objs) else np.empty(0, dtype=np.int32)
+        preds = np.frombuffer(self.preds, dtype=np.int32) if len(self.preds) else np.empty(0, dtype=np.int32)
+        if dedupe_edges and len(preds):
+            (preds, subs, objs) = np.unique(np.stack([preds, subs, objs], axis=1), axis=0).T
+        out_csr = {}
+        in_csr = {}
+        for (p, pred) in enumerate(self.predicates):
+            mask = preds == p
+            out_csr[pred] = to_csr(n, subs[mask], objs[mask])
+            in_csr[pred] = to_csr(n, objs[mask], subs[mask])
+        subsets = {name: np.unique(np.frombuffer(members, dtype=np.int32))
+                   for (name, members) in self.subsets.items()}
+        return CompactGraph(self.ids, self.labels, list(self.predicates), out_csr, in_csr,
+                            subsets=subsets, synonyms=self.synonyms)
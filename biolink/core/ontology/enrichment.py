@@ -0,0 +1,143 @@
+import numpy as np
+
+CORRECTIONS = ['bonferroni', 'bh', 'none']
+
+
+def log_factorials(n):
+    """
+    Table of log(k!) for k in 0..n
+    """
+    lf = np.zeros(n + 1)
+    if n > 0:
+        np.cumsum(np.log(np.arange(1, n + 1)), out=lf[1:])
+    return lf
+
+
+# once the terms of a tail sum fall this far (in log space) below the
+# running total they can no longer change it at double precision
+NEGLIGIBLE = 40.0
+
+
+def _log_tail(start, step, stop, n, K, N, lf):
+    """
+    log of sum of hypergeometric pmf(i) for i = start, start+step, ...
+    up to and including stop, for arrays start, stop and K.
+
+    The pmf is unimodal, so walking away from the mode the terms only
+    shrink; each sum stops as soon as further terms are negligible,
+    and the loop runs only over the sums still in progress.
+    """
+    log_total = lf[N] - lf[n] - lf[N - n]
+    log_p = np.full(len(start), -np.inf)
+    active = np.flatnonzero((stop - start) * step >= 0)
+    i = start.copy()
+    while len(active):
+        ia = i[active]
+        Ka = K[active]
+        log_pmf = (lf[Ka] - lf[ia] - lf[Ka - ia] +
+                   lf[N - Ka] - lf[n - ia] - lf[N - Ka - n + ia] -
+                   log_total)
+        previous = log_p[active]
+        log_p[active] = np.logaddexp(previous, log_pmf)
+        i[active] = ia + step
+        more = ((stop[active] - i[active]) * step >= 0) & (log_pmf > previous - NEGLIGIBLE)
+        active = active[more]
+    return log_p
+
+
+def hypergeometric_sf(k, n, K, N, lf):
+    """
+    Vectorized upper tail P(X >= k) of the hypergeometric distribution,
+    i.e. the one-sided Fisher exact test, for arrays k and K:
+    k sample subjects of n annotated to a term annotated to K of N
+    subjects in the background. lf is a log_factorials table up to N.
+
+    Terms with k above the mode sum the upper tail directly; the rest
+    sum the (then shorter) lower tail and take the complement.
+    """
+    k = np.asarray(k, dtype=np.int64)
+    K = np.asarray(K, dtype=np.int64)
+    lower = np.maximum(0, n - (N - K))
+    upper = np.minimum(n, K)
+    mode = ((n + 1) * (K + 1)) // (N + 2)
+    p = np.ones(len(k))
+    hi = k > mode
+    if hi.any():
+        p[hi] = np.exp(_log_tail(k[hi], 1, upper[hi], n, K[hi], N, lf))
+    lo = ~hi & (k > lower)
+    if lo.any():
+        p[lo] = 1.0 - np.exp(_log_tail(k[lo] - 1, -1, lower[lo], n, K[lo], N, lf))
+    return np.clip(p, 0.0, 1.0)
+
+
+def adjust_p_values(p, correction='bonferroni'):
+    """
+    Multiple-testing correction over an array of p-values
+    """
+    m = len(p)
+    if m == 0 or correction == 'none':
+        return p
+    if correction == 'bonferroni':
+        return np.minimum(p * m, 1.0)
+    if correction == 'bh':
+        order = np.argsort(p)
+        ranked = p[order] * m / np.arange(1, m + 1)
+        # enforce monotonicity from the largest p-value down
+        ranked = np.minimum.accumulate(ranked[::-1])[::-1]
+        adjusted = np.empty(m)
+        adjusted[order] = np.minimum(ranked, 1.0)
+        return adjusted
+    raise ValueError('Unknown correction: {}'.format(correction))
+
+
+class EnrichmentEngine:
+    """
+    Term enrichment over a fixed background AnnotationMatrix.
+
+    Background term counts and the log-factorial table are computed
+    once; each query then counts sample annotations with one bincount
+    and tests every term at once with array arithmetic.
+    """
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.background_counts = matrix.term_counts()
+        self.background_total = len(matrix)
+        self.lf = log_factorials(self.background_total)
+
+    def analyze(self, subjects, max_p_value=0.05, correction='bonferroni', min_sample_count=1):
+        """
+        Returns a dict with the terms over-represented among subjects,
+        sorted by p-value, plus the subjects not in the background
+        """
+        (sample, unmatched) = self.matrix.subject_indices(subjects)
+        n = len(sample)
+        results = []
+        if n > 0:
+            sample_counts = self.matrix.term_counts(sample)
+            tested = np.flatnonzero(sample_counts >= max(min_sample_count, 1))
+            k = sample_counts[tested]
+            K = self.background_counts[tested]
+            p = hypergeometric_sf(k, n, K, self.background_total, self.lf)
+            adjusted = adjust_p_values(p, correction)
+            keep = np.flatnonzero(adjusted <= max_p_value)
+            keep = keep[np.lexsort((-k[keep], adjusted[keep]))]
+            graph = self.matrix.graph
+            for j in keep:
+                t = tested[j]
+                results.append({
+                    'id': graph.ids[t],
+                    'label': graph.labels[t],
+                    'p_value': float(p[j]),
+                    'p_value_adjusted': float(adjusted[j]),
+                    'sample_count': int(k[j]),
+                    'sample_total': n,
+                    'background_count': int(K[j]),
+                    'background_total': self.background_total,
+                })
+        return {
+            'input_count': len(subjects),
+            'matched_count': n,
+            'unmatched': unmatched,
+            'results': results,
+        }
@@ -3,6 +3,40 @@ import re
 import json
 
 import networkx
+import ijson
+from ijson.common import ObjectBuilder
+
+from biolink.core.ontology.compact_graph import CompactGraphBuilder
+
+# ijson paths of the elements of each obograph
+ELEMENT_PREFIXES = {
+    'graphs.item.nodes.item': 'node',
+    'graphs.item.edges.item': 'edge',
+}
+
+def include_node(n, opts):
+    """
+    True unless an obograph node is obsolete or filtered out by opts
+    """
+    is_obsolete =  'is_obsolete' in n and n['is_obsolete'] == 'true'
+    if is_obsolete:
+        return False
+    if 'type' in opts and ('type' not in n or n['type'] != opts['type']):
+        return False
+    return True
+
+def add_obograph_node(n, digraph, opts):
+    """
+    Adds a single obograph node to an existing networkx DiGraph
+    """
+    if include_node(n, opts):
+        digraph.add_node(n['id'], attr_dict=n)
+
+def add_obograph_edge(e, digraph):
+    """
+    Adds a single obograph edge to an existing networkx DiGraph
+    """
+    digraph.add_edge(e['sub'], e['obj'], pred=e['pred'])
 
 def add_obograph_digraph(og, digraph, opts):
     """
@@ -10,14 +44,9 @@ def add_obograph_digraph(og, digraph, opts):
 
     """
     for n in og['nodes']:
-        is_obsolete =  'is_obsolete' in n and n['is_obsolete'] == 'true'
-        if is_obsolete:
-            continue
-        if 'type' in opts and ('type' not in n or n['type'] != opts['type']):
-            continue
-        digraph.add_node(n['id'], attr_dict=n)
+        add_obograph_node(n, digraph, opts)
     for e in og['edges']:
-        digraph.add_edge(e['sub'], e['obj'], pred=e['pred'])
+        add_obograph_edge(e, digraph)
 
 
 def convert_json_string(obographstr, opts):
@@ -28,16 +57,50 @@ def convert_json_string(obographstr, opts):
     """
     return convert_json_object(json.loads(obographstr), opts)
 
-def convert_json_file(obographfile, opts):
+def convert_json_file(obographfile, opts={}, compact=False):
     """
     Return a networkx MultiDiGraph of the ontologies
-    serialized as a json string
+    serialized in a json file
+
+    The file is parsed incrementally, so the json document is never
+    held in memory. If compact is set, returns a CompactGraph instead.
+    """
+    if compact:
+        target = CompactGraphBuilder()
+        (add_node, add_edge) = (add_obograph_node_compact, add_obograph_edge_compact)
+    else:
+        target = networkx.MultiDiGraph()
+        (add_node, add_edge) = (add_obograph_node, add_obograph_edge)
+    with open(obographfile, 'rb') as f:
+        for (kind, obj) in iter_obograph_elements(f):
+            if kind == 'node':
+                add_node(obj, target, opts)
+            else:
+                add_edge(obj, target)
+    if compact:
+        return target.build()
+    return target
 
+def iter_obograph_elements(f):
     """
-    f = open(obographfile, 'r')
-    jsonstr = f.read()
-    f.close()
-    return convert_json_string(jsonstr, opts)
+    Generator over ('node', n) and ('edge', e) pairs, for every node and
+    edge of every graph in an obograph json file object.
+
+    Only one node or edge is materialized at a time.
+    """
+    builder = None
+    current = None
+    for (prefix, event, value) in ijson.parse(f):
+        if builder is None:
+            if event == 'start_map' and prefix in ELEMENT_PREFIXES:
+                builder = ObjectBuilder()
+                current = prefix
+                builder.event(event, value)
+            continue
+        builder.event(event, value)
+        if event == 'end_map' and prefix == current:
+            yield (ELEMENT_PREFIXES[current], builder.value)
+            builder = None
 
 def convert_json_object(obographdoc, opts={}):
     """
@@ -53,3 +116,41 @@ def convert_json_object(obographdoc, opts={}):
 
     return digraph
 
+def add_obograph_node_compact(n, builder, opts):
+    """
+    Adds a single obograph node to a CompactGraphBuilder, keeping
+    only its label, subsets and synonyms
+    """
+    if not include_node(n, opts):
+        return
+    meta = n.get('meta', {})
+    synonyms = [syn['val'] for syn in meta.get('synonyms', []) if 'val' in syn]
+    builder.add_node(n['id'], n.get('lbl'), meta.get('subsets'), synonyms)
+
+def add_obograph_edge_compact(e, builder):
+    """
+    Adds a single obograph edge to a CompactGraphBuilder
+    """
+    builder.add_edge(e['sub'], e['pred'], e['obj'])
+
+def add_obograph_compact(og, builder, opts):
+    """
+    Adds a single obograph to a CompactGraphBuilder
+    """
+    for n in og['nodes']:
+        add_obograph_node_compact(n, builder, opts)
+    for e in og['edges']:
+        add_obograph_edge_compact(e, builder)
+
+def convert_json_object_compact(obographdoc, opts={}):
+    """
+    Return a CompactGraph of the ontologies
+    serialized as a json object
+
+    Uses a fraction of the memory of convert_json_object; use
+    to_networkx() on the result where a networkx graph is needed
+    """
+    builder = CompactGraphBuilder()
+    for og in obographdoc['graphs']:
+        add_obograph_compact(og, builder, opts)
+    return builder.build()
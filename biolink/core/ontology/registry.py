@@ -0,0 +1,99 @@
+import threading
+
+from biolink import settings
+from biolink.core.ontology.closure import ClosureIndex, DEFAULT_PREDICATES
+from biolink.core.ontology.slimmer import SlimMapper
+from biolink.core.ontology.snapshot import load_ontology
+
+_cache = {}
+_locks = {}
+_lock = threading.Lock()
+
+
+class NotReady(Exception):
+    """
+    Raised for a structure that is built at startup (see
+    biolink.util.prebuild) but is not available yet
+    """
+
+
+def _get(key, factory):
+    # each structure is built once per process and then shared read-only;
+    # the global lock only guards the per-key locks, so a slow build
+    # never blocks lookups or builds of other keys
+    try:
+        return _cache[key]
+    except KeyError:
+        pass
+    with _lock:
+        key_lock = _locks.setdefault(key, threading.Lock())
+    with key_lock:
+        if key not in _cache:
+            _cache[key] = factory()
+        return _cache[key]
+
+
+def get_ontology(name):
+    """
+    Returns the CompactGraph for a named ontology in settings.ONTOLOGY_FILES,
+    e.g. 'go' or 'hp'. Raises KeyError for unknown names
+    """
+    fn = settings.ONTOLOGY_FILES[name]
+    return _get(('ontology', name), lambda: load_ontology(fn))
+
+
+def get_closure(name, predicates=DEFAULT_PREDICATES):
+    """
+    Returns the ClosureIndex for a named ontology over a set of relations
+    """
+    predicates = tuple(predicates)
+    graph = get_ontology(name)
+    return _get(('closure', name, predicates), lambda: ClosureIndex(graph, predicates))
+
+
+def slim_subsets():
+    """
+    The configured (ontology, subset) pairs
+    """
+    return [tuple(s) for s in settings.SLIM_SUBSETS]
+
+
+def build_slim_mapper(ontology, subset):
+    """
+    Builds (once) the SlimMapper for a subset of a named ontology;
+    raises KeyError if the ontology has no such subset
+    """
+    graph = get_ontology(ontology)
+    if subset not in graph.subsets:
+        raise KeyError('Unknown subset {} for ontology {}'.format(subset, ontology))
+    return _get(('slimmer', ontology, subset), lambda: SlimMapper(get_closure(ontology), graph.subsets[subset]))
+
+
+def get_slim_mapper(ontology, subset):
+    """
+    Returns the prebuilt SlimMapper for a subset. Raises KeyError for a
+    subset not in settings.SLIM_SUBSETS, and NotReady if it has not
+    been built yet, e.g. because the ontology file is missing
+    """
+    if (ontology, subset) not in slim_subsets():
+        raise KeyError((ontology, subset))
+    return get_built(('slimmer', ontology, subset))
+
+
+def get_or_build(key, factory):
+    """
+    Caches any other structure derived from ontologies, e.g. an
+    enrichment background, under key for the lifetime of the process
+    """
+    return _get(key, factory)
+
+
+def get_built(key):
+    """
+    Returns a structure already built with get_or_build, without ever
+    building it in the caller; raises NotReady if it is not built yet
+    """
+    try:
+        return _cache[key]
+    except KeyError:
+        raise NotReady('Not built yet: {}'.format(key))
@@ -0,0 +1,122 @@
+import numpy as np
+
+from biolink.core.ontology.compact_graph import gather, to_csr
+
+METRICS = ['simgic', 'jaccard', 'resnik']
+
+
+class SimilarityEngine:
+    """
+    Profile similarity search over a fixed set of candidate entities,
+    e.g. diseases x phenotypes, given as a propagated AnnotationMatrix.
+
+    Information content is computed once from annotation counts,
+    IC(t) = -log(p(t)) with p(t) the fraction of candidates annotated
+    to t. An inverted term -> candidates index means a query only
+    touches candidates sharing at least one term with the profile, and
+    all of them are scored at once with array arithmetic.
+
+    Metrics:
+
+     - simgic: IC-weighted Jaccard of the propagated profiles
+     - jaccard: plain Jaccard of the propagated profiles
+     - resnik: for each query term, the IC of its most informative
+       common ancestor with the candidate, averaged over the query
+       (best match average, query to candidate); tolerant of noisy or
+       imprecise profiles, since near misses still score
+    """
+
+    def __init__(self, matrix, closure, labels=None):
+        self.matrix = matrix
+        self.closure = closure
+        self.graph = matrix.graph
+        self.labels = labels or {}
+        n_terms = len(self.graph)
+        n = len(matrix)
+
+        counts = matrix.term_counts()
+        self.ic = -np.log(np.maximum(counts, 1) / max(n, 1))
+        self.ic[counts == 0] = 0.0
+
+        rows = np.repeat(np.arange(n, dtype=np.int32), np.diff(matrix.indptr))
+        (self.inv_indptr, self.inv_indices) = to_csr(n_terms, matrix.indices, rows)
+        self.term_totals = np.diff(matrix.indptr).astype(np.float64)
+        self.ic_totals = np.bincount(rows, weights=self.ic[matrix.indices], minlength=n)
+
+    def _candidates(self, terms):
+        terms = np.asarray(terms, dtype=np.int64)
+        counts = self.inv_indptr[terms + 1] - self.inv_indptr[terms]
+        return (gather(self.inv_indptr, self.inv_indices, terms), counts)
+
+    def _propagate(self, weights):
+        # weight of each ancestor: the largest weight of a query term below it
+        qw = np.zeros(len(self.graph))
+        for (i, w) in weights.items():
+            anc = self.closure.ancestor_indices(i, reflexive=True)
+            qw[anc] = np.maximum(qw[anc], w)
+        return qw
+
+    def _overlap_scores(self, weights, term_weights, totals):
+        qw = self._propagate(weights) * term_weights
+        qterms = np.flatnonzero(qw)
+        (cands, counts) = self._candidates(qterms)
+        n = len(self.matrix)
+        inter = np.bincount(cands, weights=np.repeat(qw[qterms], counts), minlength=n)
+        union = totals + qw.sum() - inter
+        return np.divide(inter, union, out=np.zeros(n), where=union > 0)
+
+    def _resnik_scores(self, weights):
+        n = len(self.matrix)
+        total = np.zeros(n)
+        for (i, w) in weights.items():
+            best = np.zeros(n)
+            for a in self.closure.ancestor_indices(i, reflexive=True):
+                if self.ic[a] > 0:
+                    c = self.inv_indices[self.inv_indptr[a]:self.inv_indptr[a + 1]]
+                    best[c] = np.maximum(best[c], self.ic[a])
+            total += w * best
+        return total / sum(weights.values())
+
+    def search(self, attributes, negative_attributes=None, metric='simgic', rows=20):
+        """
+        Returns the rows best matching candidates for a profile.
+
+        attributes maps term IDs to weights in (0, 1]; candidates
+        annotated to any of negative_attributes (or their descendants)
+        are excluded. Returns a dict with matches, as dicts of id,
+        label and score, and the query terms not in the ontology.
+        """
+        if metric not in METRICS:
+            raise ValueError('Unknown metric: {}'.format(metric))
+        index = self.graph.index
+        unmatched = [t for t in list(attributes) + list(negative_attributes or []) if t not in index]
+        weights = {index[t]: w for (t, w) in attributes.items() if t in index and w > 0}
+        matches = []
+        if weights and len(self.matrix):
+            if metric == 'simgic':
+                scores = self._overlap_scores(weights, self.ic, self.ic_totals)
+            elif metric == 'jaccard':
+                scores = self._overlap_scores(weights, 1.0, self.term_totals)
+            else:
+                scores = self._resnik_scores(weights)
+            negative = [index[t] for t in negative_attributes or [] if t in index]
+            if negative:
+                scores[self._candidates(negative)[0]] = 0.0
+
+            hits = np.flatnonzero(scores > 0)
+            if len(hits) > rows:
+                hits = hits[np.argpartition(-scores[hits], rows - 1)[:rows]]
+            hits = hits[np.argsort(-scores[hits], kind='stable')]
+            subjects = self.matrix.subjects
+            for c in hits:
+                id = subjects[c]
+                matches.append({
+                    'id': id,
+                    'label': self.labels.get(id),
+                    'score': float(scores[c]),
+                })
+        return {
+            'metric': metric,
+            'unmatched': unmatched,
+            'matches': matches,
+        }
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from biolink.core.ontology.compact_graph import to_csr
+
+
+class SlimMapper:
+    """
+    Maps terms to the terms of a subset (slim) they fall under.
+
+    The full term -> slim lookup table is precomputed from a ClosureIndex
+    when the mapper is built, so mapping a batch of terms is one table
+    lookup per term with no graph walks.
+
+    By default each term maps to its most specific slim terms only;
+    slim terms that subsume another of the term's slim terms are dropped.
+    """
+
+    def __init__(self, closure, slim_indices):
+        self.closure = closure
+        self.graph = closure.graph
+        n = len(self.graph)
+        slim_indices = np.unique(np.asarray(slim_indices, dtype=np.int32))
+        self.slim_indices = slim_indices
+
+        # every (term, slim term) pair where the slim term subsumes the term
+        rows = []
+        cols = []
+        for s in slim_indices:
+            desc = closure.descendant_indices(s, reflexive=True)
+            rows.append(desc)
+            cols.append(np.full(len(desc), s, dtype=np.int32))
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int32)
+        cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.int32)
+        (self.all_indptr, self.all_indices) = to_csr(n, rows, cols)
+
+        # slim terms made redundant by a more specific slim term
+        is_slim = np.zeros(n, dtype=bool)
+        is_slim[slim_indices] = True
+        slim_ancestors = {}
+        for s in slim_indices:
+            anc = closure.ancestor_indices(s)
+            slim_ancestors[s] = anc[is_slim[anc]]
+        mrows = []
+        mcols = []
+        for i in np.flatnonzero(np.diff(self.all_indptr)):
+            mapped = self.all_indices[self.all_indptr[i]:self.all_indptr[i + 1]]
+            if len(mapped) > 1:
+                redundant = np.concatenate([slim_ancestors[s] for s in mapped])
+                mapped = mapped[~np.isin(mapped, redundant)]
+            mrows.append(np.full(len(mapped), i, dtype=np.int32))
+            mcols.append(mapped)
+        mrows = np.concatenate(mrows) if mrows else np.empty(0, dtype=np.int32)
+        mcols = np.concatenate(mcols) if mcols else np.empty(0, dtype=np.int32)
+        (self.min_indptr, self.min_indices) = to_csr(n, mrows, mcols)
+
+    def map_index(self, i, minimal=True):
+        if minimal:
+            return self.min_indices[self.min_indptr[i]:self.min_indptr[i + 1]]
+        return self.all_indices[self.all_indptr[i]:self.all_indptr[i + 1]]
+
+    def map_terms(self, ids, minimal=True):
+        """
+        Returns an OrderedDict mapping each input term ID to a list of
+        slim term IDs; unknown IDs map to an empty list
+        """
+        index = self.graph.index
+        gids = self.graph.ids
+        mappings = OrderedDict()
+        for id in ids:
+            i = index.get(id)
+            if i is None:
+                mappings[id] = []
+            else:
+                mappings[id] = [gids[j] for j in self.map_index(i, minimal)]
+        return mappings
+
+    def map_annotations(self, annotations, minimal=True):
+        """
+        Maps (subject, term) annotation pairs to the set of slim terms
+        for each subject, returned as an OrderedDict of sorted lists
+        """
+        index = self.graph.index
+        gids = self.graph.ids
+        subject_slims = OrderedDict()
+        for (subject, term) in annotations:
+            slims = subject_slims.setdefault(subject, set())
+            i = index.get(term)
+            if i is not None:
+                slims.update(self.map_index(i, minimal).tolist())
+        return OrderedDict((subject, sorted(gids[j] for j in slims))
+                           for (subject, slims) in subject_slims.items())
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from biolink import settings
+from biolink.core.ontology.compact_graph import CompactGraph
+from biolink.core.ontology.obograph_util import convert_json_file
+
+log = logging.getLogger(__name__)
+
+# Snapshot layout:
+#   MAGIC, format version (uint32), header length (uint64), json header,
+#   then each array as raw little-endian bytes at an ALIGNment boundary.
+# The header records the offset, dtype and shape of every array, so
+# arrays can be memory-mapped read-only and shared between forked workers.
+MAGIC = b'BLOGSNAP'
+VERSION = 1
+ALIGN = 64
+PREAMBLE = struct.Struct('<8sIQ')
+
+
+def file_hash(fn):
+    """
+    sha256 of a file's contents, read in chunks
+    """
+    h = hashlib.sha256()
+    with open(fn, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _pack_strings(strs):
+    # newline-joined utf-8; split() restores the list much faster
+    # than decoding each string separately
+    return np.frombuffer("\n".join((s or '').replace("\n", " ") for s in strs).encode('utf-8'), dtype=np.uint8)
+
+
+def _unpack_strings(blob):
+    s = bytes(blob).decode('utf-8')
+    return s.split("\n")
+
+
+def write_snapshot(graph, fn, source_key=None):
+    """
+    Writes a CompactGraph to fn, atomically replacing any existing file
+    """
+    arrays = [('ids', _pack_strings(graph.ids)),
+              ('labels', _pack_strings(graph.labels))]
+    for (k, p) in enumerate(graph.predicates):
+        arrays += [('out_indptr_{}'.format(k), graph.out_csr[p][0]),
+                   ('out_indices_{}'.format(k), graph.out_csr[p][1]),
+                   ('in_indptr_{}'.format(k), graph.in_csr[p][0]),
+                   ('in_indices_{}'.format(k), graph.in_csr[p][1])]
+    subset_names = sorted(graph.subsets.keys())
+    for (k, name) in enumerate(subset_names):
+        arrays.append(('subset_{}'.format(k), graph.subsets[name]))
+
+    header = {
+        'source': source_key,
+        'num_nodes': len(graph.ids),
+        'predicates': graph.predicates,
+        'subsets': subset_names,
+        'synonyms': {str(i): syns for (i, syns) in graph.synonyms.items()},
+        'arrays': {},
+    }
+    # offsets depend on the header length, so lay out relative to the
+    # data section, which starts at an aligned offset after the header
+    offset = 0
+    for (name, a) in arrays:
+        a = np.ascontiguousarray(a)
+        header['arrays'][name] = {'offset': offset, 'dtype': a.dtype.newbyteorder('<').str, 'shape': list(a.shape)}
+        offset += -(-a.nbytes // ALIGN) * ALIGN
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = -(-(PREAMBLE.size + len(header_bytes)) // ALIGN) * ALIGN
+
+    dirname = os.path.dirname(os.path.abspath(fn))
+    os.makedirs(dirname, exist_ok=True)
+    (fd, tmpfn) = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(PREAMBLE.pack(MAGIC, VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            for (name, a) in arrays:
+                f.seek(data_start + header['arrays'][name]['offset'])
+                f.write(np.ascontiguousarray(a, dtype=a.dtype.newbyteorder('<')).tobytes())
+        os.replace(tmpfn, fn)
+    except BaseException:
+        os.unlink(tmpfn)
+        raise
+
+
+def read_snapshot(fn):
+    """
+    Loads a CompactGraph from a snapshot, memory-mapping its arrays
+
+    Returns None if fn is not a snapshot in the current format
+    """
+    with open(fn, 'rb') as f:
+        preamble = f.read(PREAMBLE.size)
+        if len(preamble) < PREAMBLE.size:
+            return None
+        (magic, version, header_len) = PREAMBLE.unpack(preamble)
+        if magic != MAGIC or version != VERSION:
+            return None
+        header = json.loads(f.read(header_len).decode('utf-8'))
+    data_start = -(-(PREAMBLE.size + header_len) // ALIGN) * ALIGN
+
+    def array(name):
+        meta = header['arrays'][name]
+        shape = tuple(meta['shape'])
+        if 0 in shape:
+            return np.empty(shape, dtype=meta['dtype'])
+        return np.memmap(fn, mode='r', dtype=meta['dtype'], offset=data_start + meta['offset'], shape=shape)
+
+    n = header['num_nodes']
+    ids = _unpack_strings(array('ids')) if n else []
+    labels = [l or None for l in _unpack_strings(array('labels'))] if n else []
+    out_csr = {}
+    in_csr = {}
+    for (k, p) in enumerate(header['predicates']):
+        out_csr[p] = (array('out_indptr_{}'.format(k)), array('out_indices_{}'.format(k)))
+        in_csr[p] = (array('in_indptr_{}'.format(k)), array('in_indices_{}'.format(k)))
+    subsets = {name: array('subset_{}'.format(k)) for (k, name) in enumerate(header['subsets'])}
+    synonyms = {int(i): syns for (i, syns) in header['synonyms'].items()}
+    return CompactGraph(ids, labels, header['predicates'], out_csr, in_csr, subsets=subsets, synonyms=synonyms)
+
+
+def source_hash(obographfile, snapshot_dir=None):
+    """
+    Content hash of a source file
+
+    Hashing a large ontology is itself slow, so the hash is recorded in
+    a small sidecar keyed by path, size and mtime, and only recomputed
+    when the file changes
+    """
+    snapshot_dir = snapshot_dir or settings.ONTOLOGY_SNAPSHOT_DIR
+    path = os.path.abspath(obographfile)
+    st = os.stat(path)
+    stamp = [st.st_size, st.st_mtime_ns]
+    sidecar = os.path.join(snapshot_dir, hashlib.sha1(path.encode('utf-8')).hexdigest() + '.src')
+    try:
+        with open(sidecar) as f:
+            recorded = json.load(f)
+        if recorded['stamp'] == stamp:
+            return recorded['hash']
+    except (OSError, ValueError, KeyError):
+        pass
+    h = file_hash(path)
+    try:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        with open(sidecar, 'w') as f:
+            json.dump({'path': path, 'stamp': stamp, 'hash': h}, f)
+    except OSError as e:
+        log.warning("Could not record hash of {}: {}".format(path, e))
+    return h
+
+
+def snapshot_path(key, snapshot_dir=None):
+    snapshot_dir = snapshot_dir or settings.ONTOLOGY_SNAPSHOT_DIR
+    return os.path.join(snapshot_dir, 'v{}-{}.snap'.format(VERSION, key))
+
+
+def load_ontology(obographfile, opts={}, snapshot_dir=None):
+    """
+    Returns a CompactGraph for an obograph json file
+
+    Uses the snapshot for the file's current contents (and opts) if one
+    exists; otherwise parses the json and writes a snapshot for next time
+    """
+    key = source_hash(obographfile, snapshot_dir)
+    if opts:
+        key += '-' + hashlib.sha256(json.dumps(opts, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    fn = snapshot_path(key, snapshot_dir)
+    if os.path.exists(fn):
+        graph = read_snapshot(fn)
+        if graph is not None:
+            return graph
+        log.warning("Ignoring unreadable ontology snapshot {}".format(fn))
+    log.info("Parsing {}; no snapshot found".format(obographfile))
+    graph = convert_json_file(obographfile, opts, compact=True)
+    try:
+        write_snapshot(graph, fn, key)
+    except OSError as e:
+        log.warning("Could not write ontology snapshot {}: {}".format(fn, e))
+    return graph
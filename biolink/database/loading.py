@@ -0,0 +1,20 @@
+from sqlalchemy.orm import joinedload, selectinload, subqueryload, lazyload
+
+# relationship loading strategies, by name as used in settings
+STRATEGIES = {
+    'joined': joinedload,  # one query, LEFT OUTER JOIN; best for many-to-one
+    'selectin': selectinload,  # one extra query per page, WHERE id IN (...)
+    'subquery': subqueryload,
+    'lazy': lazyload,  # one query per row on first access
+}
+
+
+def eager_load(query, strategy, *relationships):
+    """
+    Applies a named loading strategy to relationships of a query, e.g.
+    eager_load(VariantSet.query, 'joined', VariantSet.category)
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError('Unknown loading strategy: {}'.format(strategy))
+    load = STRATEGIES[strategy]
+    return query.options(*[load(r) for r in relationships])
@@ -8,12 +8,18 @@ from biolink.database import db
 
 
 class VariantSet(db.Model):
+    # (pub_date, id) is the keyset for paging and also serves
+    # pub_date range queries
+    __table_args__ = (
+        db.Index('ix_variant_set_pub_date_id', 'pub_date', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(80))
     body = db.Column(db.Text)
     pub_date = db.Column(db.DateTime)
 
-    category_id = db.Column(db.Integer, db.ForeignKey('category.id'))
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), index=True)
     category = db.relationship('Category', backref=db.backref('posts', lazy='dynamic'))
 
     def __init__(self, title, body, category, pub_date=None):
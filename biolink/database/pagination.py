@@ -0,0 +1,126 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from math import ceil
+
+from sqlalchemy import and_, or_
+
+DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+
+def _encode_value(v):
+    if isinstance(v, datetime):
+        return {'dt': v.strftime(DATETIME_FORMAT)}
+    return v
+
+
+def _decode_value(v):
+    if isinstance(v, dict):
+        return datetime.strptime(v['dt'], DATETIME_FORMAT)
+    return v
+
+
+def encode_cursor(values):
+    """
+    Returns an opaque cursor token for the sort key values of a row
+    """
+    data = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+
+def _check_value(column, v):
+    expected = column.type.python_type
+    # bool is an int, but never a valid key value
+    if isinstance(v, bool) or not isinstance(v, expected):
+        raise ValueError('Invalid cursor: {} is not a valid {}'.format(json.dumps(_encode_value(v)), column.key))
+
+
+def decode_cursor(token, columns):
+    """
+    Returns the sort key values in a cursor token; raises ValueError
+    if the token is malformed or its values do not match the types of
+    columns
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError('expected {} values'.format(len(columns)))
+        values = [_decode_value(v) for v in values]
+    except (TypeError, KeyError, ValueError, binascii.Error) as e:
+        raise ValueError('Invalid cursor: {}'.format(e))
+    for (column, v) in zip(columns, values):
+        _check_value(column, v)
+    return values
+
+
+def after(columns, values):
+    """
+    Filter selecting rows that sort after values on columns, i.e. the
+    row comparison (c1, c2, ...) > (v1, v2, ...), expanded so that it
+    works on any database and can use an index on the columns
+    """
+    clauses = []
+    for i in range(len(columns)):
+        equal = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*(equal + [columns[i] > values[i]])))
+    return or_(*clauses)
+
+
+class KeysetPagination:
+    """
+    A page of results fetched by keyset (seek) pagination; has the
+    same attributes as a Flask-SQLAlchemy Pagination, plus cursors
+    """
+
+    def __init__(self, items, per_page, total=None, cursor=None, next_cursor=None, page=None):
+        self.items = items
+        self.per_page = per_page
+        self.total = total
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        self.page = page
+        self.pages = int(ceil(total / float(per_page))) if total is not None and per_page else None
+
+
+def keyset_paginate(query, columns, per_page, cursor=None, count=True):
+    """
+    Returns a KeysetPagination of up to per_page rows of query, ordered
+    by columns (which must together be unique, e.g. (pub_date, id)),
+    starting after the row the cursor token points at.
+
+    Each page is a range scan from the previous page's last key rather
+    than an OFFSET, so deep pages cost the same as the first. The
+    total is a separate COUNT query and is skipped unless count is set.
+    Raises ValueError for an invalid cursor.
+    """
+    total = query.order_by(None).count() if count else None
+    page_query = query
+    if cursor:
+        page_query = page_query.filter(after(columns, decode_cursor(cursor, columns)))
+    # fetch one extra row to find out whether there is a next page
+    rows = page_query.order_by(*columns).limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+    # the first page is numbered; pages after a cursor have no number
+    return KeysetPagination(items, per_page, total, cursor, next_cursor, page=None if cursor else 1)
+
+
+def offset_paginate(query, columns, page, per_page, count=True):
+    """
+    Returns a KeysetPagination of page number page (from 1) of query,
+    ordered by columns, fetched with OFFSET. As with keyset_paginate,
+    the total is a separate COUNT query and is skipped unless count is
+    set, and next_cursor continues from the end of the page by keyset
+    """
+    total = query.order_by(None).count() if count else None
+    rows = query.order_by(*columns).offset((page - 1) * per_page).limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+    return KeysetPagination(items, per_page, total, next_cursor=next_cursor, page=page)
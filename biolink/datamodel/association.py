@@ -0,0 +1,89 @@
+import json
+from sys import intern
+
+
+def intern_str(s):
+    """
+    Interns a string from a solr doc; vocabulary-like values such as
+    relation IDs, categories and sources repeat across every document
+    """
+    if isinstance(s, str):
+        return intern(s)
+    return s
+
+
+class NamedObject:
+    """
+    Compact representation of an entity or relation in an association
+    """
+    __slots__ = ('id', 'label', 'category', 'taxon')
+
+    def __init__(self, id, label=None, category=None, taxon=None):
+        self.id = id
+        self.label = label
+        self.category = category
+        self.taxon = taxon
+
+    def to_dict(self):
+        d = {'id': self.id, 'label': self.label}
+        if self.category is not None:
+            d['category'] = self.category
+        if self.taxon is not None:
+            d['taxon'] = self.taxon.to_dict()
+        return d
+
+
+class Association:
+    """
+    Compact representation of a translated golr association document.
+
+    Solr does not allow nested objects, so the evidence graph is stored
+    json-encoded; it is decoded on each access, e.g. when marshalled,
+    and never kept, as associations are cached and their size is only
+    measured when they are added to the cache.
+    """
+    __slots__ = ('id', 'subject', 'object', 'relation', 'publications',
+                 'provided_by', 'evidence', '_evidence_graph_json')
+
+    def __init__(self, id, subject=None, object=None, relation=None, publications=None,
+                 provided_by=None, evidence=None, evidence_graph_json=None):
+        self.id = id
+        self.subject = subject
+        self.object = object
+        self.relation = relation
+        self.publications = publications
+        self.provided_by = provided_by
+        self.evidence = evidence
+        self._evidence_graph_json = evidence_graph_json
+
+    @property
+    def evidence_graph(self):
+        if self._evidence_graph_json is None:
+            return None
+        return json.loads(self._evidence_graph_json)
+
+    def to_dict(self):
+        d = {
+            'id': self.id,
+            'subject': self.subject.to_dict() if self.subject is not None else None,
+            'object': self.object.to_dict() if self.object is not None else None,
+            'relation': self.relation.to_dict() if self.relation is not None else None,
+            'publications': [p.to_dict() for p in self.publications] if self.publications is not None else None,
+            'provided_by': self.provided_by,
+        }
+        if self.evidence is not None:
+            d['evidence'] = self.evidence
+        if self._evidence_graph_json is not None:
+            d['evidence_graph'] = self.evidence_graph
+        return d
+
+
+class AssociationJSONEncoder(json.JSONEncoder):
+    """
+    Encodes Association objects in responses that are not marshalled
+    """
+
+    def default(self, o):
+        if isinstance(o, (Association, NamedObject)):
+            return o.to_dict()
+        return json.JSONEncoder.default(self, o)
@@ -32,6 +32,38 @@ bbop_graph = api.model('Graph', {
 })
 
 
+evidence_count = api.model('EvidenceCount', {
+    'id': fields.String(readOnly=True, description='Evidence type or relation ID'),
+    'label': fields.String(readOnly=True, description='Label, if present in the merged graph'),
+    'count': fields.Integer(readOnly=True, description='Number of associations (evidence types) or distinct edges (relations)'),
+})
+
+evidence_summary = api.model('EvidenceSummary', {
+    'association_count': fields.Integer(readOnly=True, description='Number of associations found'),
+    'node_count': fields.Integer(readOnly=True, description='Distinct nodes across all evidence graphs'),
+    'edge_count': fields.Integer(readOnly=True, description='Distinct edges across all evidence graphs'),
+    'evidence_types': fields.List(fields.Nested(evidence_count), description='Associations supported by each evidence type'),
+    'predicates': fields.List(fields.Nested(evidence_count), description='Distinct edges per relation'),
+})
+
+association_evidence_graph = api.model('AssociationEvidenceGraph', {
+    'id': fields.String(readOnly=True, description='Association ID'),
+    'evidence_graph': fields.Nested(bbop_graph),
+})
+
+evidence_batch_query = api.model('EvidenceBatchQuery', {
+    'ids': fields.List(fields.String, required=True, description='Association IDs'),
+    'merge': fields.Boolean(description='If set, returns one merged, deduplicated graph instead of one graph per association', default=False),
+    'summary': fields.Boolean(description='If set, returns evidence type and relation counts instead of graphs', default=False),
+})
+
+evidence_batch_results = api.model('EvidenceBatchResults', {
+    'graphs': fields.List(fields.Nested(association_evidence_graph), description='Evidence graph of each association'),
+    'merged': fields.Nested(bbop_graph, allow_null=True, description='Merged evidence graph'),
+    'summary': fields.Nested(evidence_summary, allow_null=True, description='Evidence summary'),
+    'missing': fields.List(fields.String, description='Requested association IDs not found'),
+})
+
 named_object = api.model('NamedObject', {
     'id': fields.String(readOnly=True, description='ID'),
     'label': fields.String(readOnly=True, description='RDFS Label'),
@@ -57,6 +89,97 @@ bio_object = api.inherit('BioObject', named_object, {
 })
 
 
+# Ontology
+
+slim_mapping = api.model('SlimMapping', {
+    'id': fields.String(readOnly=True, description='Input term ID, or annotation subject ID'),
+    'slim': fields.List(fields.String, description='IDs of subset terms the input maps to'),
+})
+
+slim_results = api.model('SlimResults', {
+    'ontology': fields.String(readOnly=True, description='Ontology name, e.g. go'),
+    'subset': fields.String(readOnly=True, description='Subset name, e.g. goslim_generic'),
+    'mappings': fields.List(fields.Nested(slim_mapping)),
+})
+
+slim_annotation = api.model('SlimAnnotation', {
+    'subject': fields.String(description='Annotated entity, e.g. NCBIGene:84570'),
+    'object': fields.String(description='Ontology term, e.g. GO:0005634'),
+})
+
+slim_query = api.model('SlimQuery', {
+    'ids': fields.List(fields.String, description='Term IDs to map'),
+    'annotations': fields.List(fields.Nested(slim_annotation), description='Annotations to map, by subject'),
+    'ontology': fields.String(description='Ontology name', default='go'),
+    'minimal': fields.Boolean(description='Map only to the most specific subset terms', default=True),
+})
+
+enrichment_term = api.model('EnrichmentTerm', {
+    'id': fields.String(readOnly=True, description='Ontology term ID, e.g. GO:0005634'),
+    'label': fields.String(readOnly=True, description='Term label'),
+    'p_value': fields.Float(readOnly=True, description='Hypergeometric (one-sided Fisher exact) p-value'),
+    'p_value_adjusted': fields.Float(readOnly=True, description='p-value after multiple-testing correction'),
+    'sample_count': fields.Integer(readOnly=True, description='Input entities annotated to the term'),
+    'sample_total': fields.Integer(readOnly=True, description='Input entities found in the background'),
+    'background_count': fields.Integer(readOnly=True, description='Background entities annotated to the term'),
+    'background_total': fields.Integer(readOnly=True, description='Entities in the background'),
+})
+
+enrichment_results = api.model('EnrichmentResults', {
+    'input_count': fields.Integer(readOnly=True, description='Number of input entities'),
+    'matched_count': fields.Integer(readOnly=True, description='Number of input entities found in the background'),
+    'unmatched': fields.List(fields.String, description='Input entities not found in the background'),
+    'results': fields.List(fields.Nested(enrichment_term), description='Enriched terms, most significant first'),
+})
+
+enrichment_query = api.model('EnrichmentQuery', {
+    'bioentity_ids': fields.List(fields.String, description='Entity IDs to test, e.g. NCBIGene:84570'),
+    'ontology': fields.String(description='Ontology name; this and the next three fields default to the first configured background'),
+    'subject_category': fields.String(description='Category of the input entities'),
+    'object_category': fields.String(description='Category of the annotations'),
+    'taxon': fields.String(description='Background taxon, e.g. NCBITaxon:9606'),
+    'max_p_value': fields.Float(description='Maximum corrected p-value of returned terms', default=0.05),
+    'correction': fields.String(description='Multiple-testing correction: bonferroni, bh or none', default='bonferroni'),
+})
+
+
+# Autocomplete
+
+autocomplete_match = api.model('AutocompleteMatch', {
+    'id': fields.String(readOnly=True, description='Entity ID'),
+    'label': fields.String(readOnly=True, description='Entity label'),
+    'category': fields.String(readOnly=True, description='Entity category, e.g. gene'),
+    'taxon': fields.String(readOnly=True, description='Entity taxon ID, if any'),
+})
+
+# Similarity
+
+sim_match = api.model('SimMatch', {
+    'id': fields.String(readOnly=True, description='Matching entity ID'),
+    'label': fields.String(readOnly=True, description='Matching entity label'),
+    'score': fields.Float(readOnly=True, description='Similarity score; scale depends on the metric'),
+})
+
+sim_results = api.model('SimResults', {
+    'metric': fields.String(readOnly=True, description='Similarity metric used: simgic, jaccard or resnik'),
+    'unmatched': fields.List(fields.String, description='Query attributes not found in the ontology'),
+    'matches': fields.List(fields.Nested(sim_match), description='Best matching entities, highest score first'),
+})
+
+# LEGO (GO-CAM)
+
+cam_model_summary = api.model('CamModelSummary', {
+    'id': fields.String(readOnly=True, description='Model IRI'),
+    'title': fields.String(readOnly=True, description='Model title'),
+    'activity_count': fields.Integer(readOnly=True, description='Number of activities; null if not computed in time'),
+})
+
+cam_summary = api.model('CamSummary', {
+    'models': fields.List(fields.Nested(cam_model_summary)),
+    'partial': fields.Boolean(readOnly=True, description='True if some counts were not computed before the deadline'),
+    'timed_out': fields.List(fields.String, description='Models whose counts timed out or failed'),
+})
+
 # Assoc
 
 association = api.model('Association', {
@@ -73,6 +196,25 @@ association_results = api.inherit('AssociationResults', search_result, {
     'associations': fields.List(fields.Nested(association))
 })
 
+gene_summary = api.model('GeneSummary', {
+    'id': fields.String(readOnly=True, description='ID'),
+    'interactions': fields.Nested(association_results),
+    'phenotypes': fields.Nested(association_results),
+    'expressed': fields.Nested(association_results),
+    'pubs': fields.Nested(association_results),
+})
+
+association_batch_query = api.model('AssociationBatchQuery', {
+    'subjects': fields.List(fields.String, description='SUBJECT ids, e.g. NCBIGene:84570. Includes inferred by default'),
+    'objects': fields.List(fields.String, description='OBJECT ids, e.g. HP:0011927. Includes inferred by default'),
+    'subject_category': fields.String(description='CATEGORY of entity at link SUBJECT (source), e.g. gene'),
+    'object_category': fields.String(description='CATEGORY of entity at link OBJECT (target), e.g. phenotype'),
+    'subject_taxon': fields.String(description='SUBJECT TAXON id, e.g. NCBITaxon:9606'),
+    'rows': fields.Integer(description='Maximum number of associations per input id, at most 100', default=10),
+    'exclude_evidence': fields.Boolean(description='If set, excludes evidence objects in response'),
+    'map_identifiers': fields.String(description='Prefix to map all IDs to'),
+})
+
 
 # Bio Objects
 
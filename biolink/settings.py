@@ -11,3 +11,77 @@ RESTPLUS_ERROR_404_HELP = False
 # SQLAlchemy settings
 SQLALCHEMY_DATABASE_URI = 'sqlite:///db.sqlite'
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+VARIATION_EAGER_LOADING = 'joined'  # how variant set categories are loaded: joined, selectin, subquery or lazy
+
+# Solr settings
+SOLR_ENDPOINTS = {
+    'golr': {'url': 'https://solr.monarchinitiative.org/solr/golr/', 'timeout': 5},
+    'search': {'url': 'https://solr.monarchinitiative.org/solr/search/', 'timeout': 10},
+}
+SOLR_TIMEOUT = 5  # seconds, unless overridden per endpoint
+SOLR_POOL_SIZE = 10  # pooled keep-alive connections per endpoint
+SOLR_RETRIES = 2
+SOLR_RETRY_BACKOFF = 0.2  # seconds, doubled on each retry
+SOLR_BREAKER_FAILURES = 5  # consecutive failed calls before failing fast
+SOLR_BREAKER_RESET = 30  # seconds before probing solr again
+
+# Golr settings
+GOLR_CACHE_MAX_ENTRIES = 10000
+GOLR_CACHE_MAX_BYTES = 256 * 1024 * 1024  # approximate
+GOLR_CACHE_TTL = 3600  # seconds; set to 0 to disable the result cache
+GOLR_FACET_LIMIT = 25  # default number of values per requested facet
+GOLR_EXPORT_BATCH_SIZE = 1000  # docs fetched per cursorMark round trip
+GOLR_BATCH_MAX_IDS = 1000  # upper bound on input IDs per batch query
+GOLR_BATCH_MAX_ROWS = 100  # upper bound on associations returned per input ID
+
+# Concurrency settings
+FANOUT_MAX_WORKERS = 20  # threads shared by all concurrent backend fan-outs
+
+# Ontology settings
+ONTOLOGY_SNAPSHOT_DIR = '/tmp/biolink/ontology_snapshots'  # binary caches of parsed obographs
+ONTOLOGY_FILES = {
+    # obograph json, e.g. from http://purl.obolibrary.org/obo/go.json
+    'go': 'ontologies/go.json',
+    'hp': 'ontologies/hp.json',
+}
+
+# Prebuilt structures: built in the background at startup, never in a request
+PREBUILD_ON_STARTUP = True
+PREBUILD_RETRY_INTERVAL = 300  # seconds between attempts to build structures that failed
+SLIM_SUBSETS = [
+    # (ontology, subset) for the slimmer
+    ('go', 'goslim_generic'),
+]
+ENRICHMENT_BACKGROUNDS = [
+    # (ontology, subject_category, object_category, subject taxon or None for all)
+    ('go', 'gene', 'function', 'NCBITaxon:9606'),
+]
+SIMILARITY_CANDIDATES = [
+    # (ontology, category, attribute_category, subject taxon or None for all)
+    ('hp', 'disease', 'phenotype', None),
+]
+SIMILARITY_MAX_ROWS = 1000  # upper bound on matches per similarity query
+
+# Rendering settings
+RENDER_CACHE_DIR = '/tmp/biolink/render_cache'  # content-addressed, safe to share between workers
+RENDER_MAX_WORKERS = 2  # render processes
+RENDER_MAX_PENDING = 8  # renders queued or running before requests are turned away
+RENDER_TIMEOUT = 30  # seconds
+RENDER_FIGSIZE = (8, 6)  # inches
+
+# LEGO (GO-CAM) settings
+LEGO_BACKEND = 'sparql'  # 'sparql' for the remote endpoint, 'local' for the model store
+LEGO_STORE_PATH = 'lego_models.sqlite'  # built with python -m biolink.core.lego.store
+LEGO_SPARQL_URL = 'http://rdf.geneontology.org/sparql'
+LEGO_CACHE_MAX_ENTRIES = 1000
+LEGO_CACHE_MAX_BYTES = 128 * 1024 * 1024  # approximate
+LEGO_CACHE_TTL = 3600  # seconds; set to 0 to disable the result cache
+LEGO_BLOCK_SIZE = 500  # rows fetched and cached per SPARQL round trip
+LEGO_MAX_ROWS = 1000  # upper bound on rows per page
+LEGO_QUERY_TIMEOUT = 10  # seconds; also the deadline for a request's concurrent queries
+LEGO_COUNT_CHUNK_SIZE = 50  # models per activity count query; chunks run concurrently
+
+# Autocomplete settings
+AUTOCOMPLETE_ONTOLOGIES = {'hp': 'phenotype', 'go': 'function'}  # ontology name -> category of its terms
+AUTOCOMPLETE_SEARCH_CATEGORIES = ['gene', 'disease']  # indexed from the search core (SOLR_ENDPOINTS['search'])
+AUTOCOMPLETE_MAX_ROWS = 100  # upper bound on matches per lookup
@@ -0,0 +1,312 @@
+import bisect
+import logging
+from array import array
+
+import numpy as np
+
+from biolink import settings
+from biolink.core.ontology.registry import get_closure, get_or_build, get_built, NotReady
+from biolink.util.solr_client import get_solr, iter_docs
+from biolink.util.solr_query import SolrQuery
+
+log = logging.getLogger(__name__)
+
+# prefixes matching more keys than this get a precomputed top-k list
+SCAN_LIMIT = 256
+# entities kept in each precomputed list, enough to survive a taxon filter
+TOP_K = 100
+# words of a label or synonym, after the first, that a match may start at
+MAX_WORD_STARTS = 8
+
+MAX_CHAR = '\U0010ffff'
+
+# fields of search core docs; label, synonym and taxon may be multivalued,
+# and edges is the number of associations of the entity
+SEARCH_FIELDS = ['id', 'label', 'synonym', 'taxon', 'edges']
+
+
+def normalize(s):
+    return ' '.join(s.lower().split())
+
+
+class _Keys:
+    """
+    Sorted keys stored as one concatenated string plus offsets,
+    indexable like a list so bisect works on it. Offsets are a plain
+    array, as numpy scalar indexing would dominate each lookup.
+    """
+
+    def __init__(self, keys):
+        self.text = ''.join(keys)
+        self.offsets = array('q', [0])
+        total = 0
+        for k in keys:
+            total += len(k)
+            self.offsets.append(total)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.text[self.offsets[i]:self.offsets[i + 1]]
+
+
+class PrefixIndex:
+    """
+    In-memory prefix index over entity labels, synonyms and IDs.
+
+    Every label and synonym is indexed from its start and from the start
+    of each word, so 'syndrome' matches 'Marfan syndrome'. Keys are kept
+    sorted in a single string with an offsets array; a prefix maps to a
+    contiguous range found by binary search, and matching entities are
+    ranked by popularity. Short prefixes, which match huge ranges, have
+    their top entities precomputed.
+
+    Build with PrefixIndexBuilder.
+    """
+
+    def __init__(self, category, ids, labels, taxa, popularity, keys, entities):
+        self.category = category
+        self.ids = ids
+        self.labels = labels
+        self.taxon_ids = sorted(set(t for t in taxa if t is not None))
+        self.taxon_index = {t: i for (i, t) in enumerate(self.taxon_ids)}
+        self.taxon_codes = np.array([self.taxon_index.get(t, -1) for t in taxa], dtype=np.int32)
+        self.popularity = np.asarray(popularity, dtype=np.float64)
+        self.label_lengths = np.array([len(l or '') for l in labels], dtype=np.int32)
+        self.keys = _Keys(keys)
+        self.entities = np.asarray(entities, dtype=np.int32)
+        self.top = {}
+        self._precompute('')
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _range(self, prefix):
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_right(self.keys, prefix + MAX_CHAR, lo)
+        return (lo, hi)
+
+    def _rank(self, entities):
+        entities = np.unique(entities)
+        order = np.lexsort((self.label_lengths[entities], -self.popularity[entities]))
+        return entities[order]
+
+    def _precompute(self, prefix):
+        # visit each child prefix of a too-large range by jumping over
+        # the ranges of its siblings
+        (lo, hi) = self._range(prefix)
+        if hi - lo <= SCAN_LIMIT:
+            return
+        if prefix:
+            self.top[prefix] = self._rank(self.entities[lo:hi])[:TOP_K]
+        n = len(prefix)
+        i = lo
+        while i < hi:
+            key = self.keys[i]
+            if len(key) == n:
+                i += 1
+                continue
+            child = key[:n + 1]
+            self._precompute(child)
+            i = bisect.bisect_right(self.keys, child + MAX_CHAR, i, hi)
+
+    def _filter(self, entities, taxon):
+        if taxon is None:
+            return entities
+        code = self.taxon_index.get(taxon)
+        codes = self.taxon_codes[entities]
+        # entities without a taxon, e.g. ontology terms, apply to all taxa
+        keep = codes == -1
+        if code is not None:
+            keep |= codes == code
+        return entities[keep]
+
+    def search(self, prefix, rows=10, taxon=None):
+        """
+        Returns up to rows entity indices with a label, synonym or ID
+        starting with prefix, most popular first
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return np.empty(0, dtype=np.int32)
+        top = self.top.get(prefix)
+        if top is not None:
+            matches = self._filter(top, taxon)
+            if len(matches) >= rows:
+                return matches[:rows]
+        (lo, hi) = self._range(prefix)
+        return self._filter(self._rank(self.entities[lo:hi]), taxon)[:rows]
+
+    def entity(self, i):
+        code = self.taxon_codes[i]
+        return {
+            'id': self.ids[i],
+            'label': self.labels[i],
+            'category': self.category,
+            'taxon': self.taxon_ids[code] if code >= 0 else None,
+        }
+
+
+class PrefixIndexBuilder:
+    """
+    Accumulates entities for a PrefixIndex; adding an entity again
+    merges its synonyms and adds to its popularity
+    """
+
+    def __init__(self, category):
+        self.category = category
+        self.index = {}
+        self.ids = []
+        self.labels = []
+        self.taxa = []
+        self.popularity = []
+        self.names = []
+
+    def add(self, id, label=None, synonyms=None, taxon=None, popularity=1):
+        i = self.index.get(id)
+        if i is None:
+            i = len(self.ids)
+            self.index[id] = i
+            self.ids.append(id)
+            self.labels.append(label)
+            self.taxa.append(taxon)
+            self.popularity.append(0)
+            self.names.append(set())
+        self.popularity[i] += popularity
+        names = self.names[i]
+        for name in [label] + list(synonyms or []):
+            if name:
+                names.add(normalize(name))
+
+    def build(self):
+        pairs = set()
+        for (i, names) in enumerate(self.names):
+            pairs.add((self.ids[i].lower(), i))
+            for name in names:
+                pairs.add((name, i))
+                words = name.split(' ')
+                start = 0
+                for w in words[:MAX_WORD_STARTS]:
+                    if start:
+                        pairs.add((name[start:], i))
+                    start += len(w) + 1
+        pairs = sorted(pairs)
+        return PrefixIndex(self.category,
+                           self.ids,
+                           self.labels,
+                           self.taxa,
+                           self.popularity,
+                           [k for (k, _) in pairs],
+                           [i for (_, i) in pairs])
+
+
+def index_ontology(name, category):
+    """
+    Indexes the labels and synonyms of an ontology's terms; popularity
+    is the number of terms each subsumes, so general terms rank first
+    """
+    closure = get_closure(name)
+    graph = closure.graph
+    builder = PrefixIndexBuilder(category)
+    descendants = np.diff(closure.desc_indptr)
+    for (i, id) in enumerate(graph.ids):
+        if graph.labels[i] is None:
+            continue
+        builder.add(id, graph.labels[i], graph.synonyms.get(i), popularity=1 + int(descendants[i]))
+    return builder.build()
+
+
+def as_list(v):
+    if v is None:
+        return []
+    return v if isinstance(v, list) else [v]
+
+
+def index_search_entities(category):
+    """
+    Indexes the labels and synonyms of all entities of a category in the
+    search core (SOLR_ENDPOINTS['search']); popularity is the number of
+    associations (edges) of each entity
+    """
+    query = SolrQuery().filter('category', category)
+    query.set('fl', ','.join(SEARCH_FIELDS))
+    query.set('rows', settings.GOLR_EXPORT_BATCH_SIZE)
+    query.set('sort', 'id asc')
+    builder = PrefixIndexBuilder(category)
+    for d in iter_docs(get_solr('search'), query.to_params()):
+        labels = as_list(d.get('label'))
+        taxa = as_list(d.get('taxon'))
+        builder.add(d['id'],
+                    labels[0] if labels else None,
+                    labels[1:] + as_list(d.get('synonym')),
+                    taxon=taxa[0] if taxa else None,
+                    popularity=1 + int(d.get('edges') or 0))
+    return builder.build()
+
+
+def categories():
+    return list(settings.AUTOCOMPLETE_ONTOLOGIES.values()) + list(settings.AUTOCOMPLETE_SEARCH_CATEGORIES)
+
+
+def build_index(category):
+    """
+    Builds (once) the PrefixIndex for a category; this is slow, so it is
+    done at startup (see biolink.util.prebuild). Raises KeyError for
+    categories not configured in settings
+    """
+    ontologies = {c: o for (o, c) in settings.AUTOCOMPLETE_ONTOLOGIES.items()}
+    if category in ontologies:
+        factory = lambda: index_ontology(ontologies[category], category)
+    elif category in settings.AUTOCOMPLETE_SEARCH_CATEGORIES:
+        factory = lambda: index_search_entities(category)
+    else:
+        raise KeyError(category)
+
+    def build():
+        index = factory()
+        log.info("Autocomplete index {}: {} entities".format(category, len(index)))
+        return index
+    return get_or_build(('autocomplete', category), build)
+
+
+def get_index(category):
+    """
+    Returns the prebuilt PrefixIndex for a category. Raises KeyError for
+    categories not configured in settings, and NotReady if it has not
+    been built yet
+    """
+    if category not in categories():
+        raise KeyError(category)
+    return get_built(('autocomplete', category))
+
+
+def ready_indexes():
+    """
+    Returns the indexes of all categories built so far
+    """
+    indexes = []
+    for c in categories():
+        try:
+            indexes.append(get_index(c))
+        except NotReady:
+            continue
+    if not indexes:
+        raise NotReady('No autocomplete index has been built yet')
+    return indexes
+
+
+def autocomplete(prefix, category=None, taxon=None, rows=10):
+    """
+    Returns up to rows entities matching prefix, as dicts, across the
+    given categories (default all that have been built). Popularity is
+    not comparable across categories, so results are interleaved by rank
+    within each category
+    """
+    indexes = [get_index(c) for c in category] if category else ready_indexes()
+    matches = []
+    for (n, index) in enumerate(indexes):
+        for (rank, i) in enumerate(index.search(prefix, rows, taxon)):
+            matches.append((rank, n, index, i))
+    matches.sort(key=lambda m: m[:2])
+    return [index.entity(i) for (_, _, index, i) in matches[:rows]]
@@ -0,0 +1,104 @@
+"""
+Annotation-derived structures: enrichment backgrounds and similarity
+search candidates.
+
+Building one streams every matching golr association, so they are only
+built for the combinations configured in settings, once at startup (see
+biolink.util.prebuild), and never in a request.
+"""
+import logging
+
+from biolink import settings
+from biolink.core.ontology.annotations import AnnotationMatrix
+from biolink.core.ontology.enrichment import EnrichmentEngine
+from biolink.core.ontology.similarity import SimilarityEngine
+from biolink.core.ontology.registry import get_closure, get_or_build, get_built
+from biolink.util.golr_associations import iter_associations
+
+log = logging.getLogger(__name__)
+
+
+def enrichment_backgrounds():
+    """
+    The configured (ontology, subject_category, object_category, taxon) backgrounds
+    """
+    return [tuple(b) for b in settings.ENRICHMENT_BACKGROUNDS]
+
+
+def enrichment_key(ontology, subject_category, object_category, taxon=None):
+    return ('enrichment', ontology, subject_category, object_category, taxon)
+
+
+def build_enrichment_engine(ontology, subject_category, object_category, taxon=None):
+    """
+    Builds (once) the EnrichmentEngine for a background of all golr
+    associations of subject_category to object_category
+    """
+    def build():
+        closure = get_closure(ontology)
+        associations = iter_associations(subject_category=subject_category,
+                                         object_category=object_category,
+                                         subject_taxon=taxon,
+                                         mask='subject,object')
+        pairs = ((a.subject.id, a.object.id) for a in associations)
+        matrix = AnnotationMatrix.from_pairs(pairs, closure)
+        log.info("Enrichment background {} {}: {} subjects".format(subject_category, object_category, len(matrix)))
+        return EnrichmentEngine(matrix)
+    return get_or_build(enrichment_key(ontology, subject_category, object_category, taxon), build)
+
+
+def get_enrichment_engine(ontology, subject_category, object_category, taxon=None):
+    """
+    Returns the prebuilt EnrichmentEngine for a background. Raises
+    KeyError for a background not in settings.ENRICHMENT_BACKGROUNDS,
+    and NotReady if it has not been built yet
+    """
+    background = (ontology, subject_category, object_category, taxon)
+    if background not in enrichment_backgrounds():
+        raise KeyError(background)
+    return get_built(enrichment_key(*background))
+
+
+def similarity_candidates():
+    """
+    The configured (ontology, category, attribute_category, taxon) candidate sets
+    """
+    return [tuple(c) for c in settings.SIMILARITY_CANDIDATES]
+
+
+def similarity_key(ontology, category, attribute_category, taxon=None):
+    return ('similarity', ontology, category, attribute_category, taxon)
+
+
+def build_similarity_engine(ontology, category, attribute_category, taxon=None):
+    """
+    Builds (once) the SimilarityEngine over all entities of a category,
+    from their golr associations to attributes
+    """
+    def build():
+        closure = get_closure(ontology)
+        labels = {}
+
+        def pairs():
+            for a in iter_associations(subject_category=category,
+                                       object_category=attribute_category,
+                                       subject_taxon=taxon,
+                                       mask='subject,object'):
+                labels[a.subject.id] = a.subject.label
+                yield (a.subject.id, a.object.id)
+        matrix = AnnotationMatrix.from_pairs(pairs(), closure)
+        log.info("Similarity candidates {} {}: {}".format(category, attribute_category, len(matrix)))
+        return SimilarityEngine(matrix, closure, labels)
+    return get_or_build(similarity_key(ontology, category, attribute_category, taxon), build)
+
+
+def get_similarity_engine(ontology, category, attribute_category, taxon=None):
+    """
+    Returns the prebuilt SimilarityEngine for a candidate set. Raises
+    KeyError for a set not in settings.SIMILARITY_CANDIDATES, and
+    NotReady if it has not been built yet
+    """
+    candidates = (ontology, category, attribute_category, taxon)
+    if candidates not in similarity_candidates():
+        raise KeyError(candidates)
+    return get_built(similarity_key(*candidates))
@@ -0,0 +1,155 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+def approx_sizeof(obj):
+    """
+    Rough recursive estimate of the memory used by a result object.
+
+    Only descends into the builtin containers and objects with a __dict__
+    or __slots__, which is all a translated association result contains
+    """
+    seen = set()
+    stack = [obj]
+    size = 0
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        size += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        elif hasattr(o, '__dict__'):
+            stack.append(vars(o))
+        elif hasattr(o, '__slots__'):
+            stack.extend(getattr(o, s) for s in o.__slots__ if hasattr(o, s))
+    return size
+
+
+class NullCache:
+    """
+    Cache that stores nothing; plug this in to disable caching
+    """
+
+    def get(self, key):
+        return None
+
+    def put(self, key, value):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with a per-entry time-to-live.
+
+    Bounded both by number of entries and by an approximate memory
+    footprint; least recently used entries are evicted first.
+    """
+
+    def __init__(self, max_entries=1000, max_bytes=None, ttl=None, sizeof=approx_sizeof):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        self._entries = OrderedDict()  # key -> (expires, size, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns cached value for key, or None if absent or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            (expires, size, value) = entry
+            if expires is not None and expires < time.time():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            # never cache something that would flush the whole cache
+            return
+        expires = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires, size, value)
+            self.current_bytes += size
+            while (len(self._entries) > self.max_entries or
+                   (self.max_bytes is not None and self.current_bytes > self.max_bytes)):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        (_, size, _) = self._entries.pop(key)
+        self.current_bytes -= size
+
+
+def make_cache(max_entries, max_bytes, ttl):
+    """
+    Builds an LRUCache, or a NullCache if max_entries or ttl is unset
+    """
+    if not ttl or not max_entries:
+        return NullCache()
+    return LRUCache(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+
+
+def cached_call(cache, inflight, key, fn):
+    """
+    Returns the cached value for key, or else calls fn and caches the
+    result. Concurrent misses for the same key share a single call
+    through inflight, a SingleFlight
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    def fill():
+        # a flight that just finished may have filled the cache
+        value = cache.get(key)
+        if value is None:
+            value = fn()
+            cache.put(key, value)
+        return value
+    return inflight.do(key, fill)
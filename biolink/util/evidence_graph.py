@@ -0,0 +1,56 @@
+from collections import Counter
+
+from biolink.core.ontology.compact_graph import CompactGraphBuilder
+
+
+def merge_graphs(graphs):
+    """
+    Merges obograph json evidence graphs into a CompactGraph
+
+    Nodes are unified by ID and edges shared by several graphs are
+    kept once
+    """
+    builder = CompactGraphBuilder()
+    for g in graphs:
+        for n in g.get('nodes', []):
+            builder.add_node(n['id'], n.get('lbl'))
+        for e in g.get('edges', []):
+            builder.add_edge(e['sub'], e['pred'], e['obj'])
+    return builder.build(dedupe_edges=True)
+
+
+def to_obograph(graph):
+    """
+    Returns a CompactGraph as an obograph json graph
+    """
+    return {
+        'nodes': [{'id': id, 'lbl': graph.labels[i]} for (i, id) in enumerate(graph.ids)],
+        'edges': [{'sub': s, 'pred': p, 'obj': o} for (s, p, o) in graph.edges()],
+    }
+
+
+def counts_list(counter, labels):
+    return [{'id': id, 'label': labels.get(id), 'count': n}
+            for (id, n) in counter.most_common()]
+
+
+def summarize(associations, graph):
+    """
+    Collapses the evidence of many associations into counts
+
+    evidence_types counts the associations supported by each evidence
+    type (ECO class); predicates counts the distinct edges of the
+    merged graph per relation
+    """
+    labels = {id: graph.labels[i] for (i, id) in enumerate(graph.ids)}
+    evidence = Counter()
+    for a in associations:
+        evidence.update(set(a.evidence or []))
+    predicates = Counter({p: len(graph.out_csr[p][1]) for p in graph.predicates})
+    return {
+        'association_count': len(associations),
+        'node_count': len(graph),
+        'edge_count': graph.number_of_edges(),
+        'evidence_types': counts_list(evidence, labels),
+        'predicates': counts_list(predicates, labels),
+    }
@@ -0,0 +1,63 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from biolink import settings
+
+log = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Returns the shared thread pool used for concurrent backend calls
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.FANOUT_MAX_WORKERS)
+        return _executor
+
+
+def fan_out(calls, timeout=None):
+    """
+    Runs a set of independent calls concurrently and merges the results
+
+    calls is a dict mapping a name to a zero-argument callable, e.g. a
+    functools.partial over search_associations. Returns a dict mapping
+    each name to its result, so total latency is that of the slowest
+    call rather than the sum. The first exception raised is re-raised.
+    """
+    executor = get_executor()
+    futures = {name: executor.submit(fn) for (name, fn) in calls.items()}
+    return {name: f.result(timeout=timeout) for (name, f) in futures.items()}
+
+
+def fan_out_partial(calls, timeout):
+    """
+    Like fan_out, but waits no longer than timeout seconds in total and
+    returns whatever completed
+
+    Returns (results, failed): results maps the name of each call that
+    completed in time to its result; failed lists the names of calls
+    that timed out or raised. Calls still queued at the deadline are
+    cancelled; calls already running cannot be interrupted, so they
+    should enforce the same deadline themselves (e.g. a socket timeout).
+    """
+    executor = get_executor()
+    futures = {name: executor.submit(fn) for (name, fn) in calls.items()}
+    wait(futures.values(), timeout=timeout)
+    results = {}
+    failed = []
+    for (name, f) in futures.items():
+        if not f.done():
+            f.cancel()
+            failed.append(name)
+        elif f.exception() is not None:
+            log.warning("Call {} failed: {}".format(name, f.exception()))
+            failed.append(name)
+        else:
+            results[name] = f.result()
+    return (results, failed)
@@ -1,7 +1,13 @@
 import logging
 
-import pysolr
-import json
+from collections import OrderedDict
+from flask_restplus.mask import Mask
+from biolink import settings
+from biolink.datamodel.association import Association, NamedObject, intern_str
+from biolink.util.cache import cached_call, make_cache
+from biolink.util.solr_client import get_solr, iter_docs
+from biolink.util.solr_query import SolrQuery, term_query
+from biolink.util.singleflight import SingleFlight
 
 # CV
 class GolrFields:
@@ -58,41 +64,63 @@ class GolrFields:
   
 M=GolrFields()  
   
-# TODO: config
-golr_url = "https://solr.monarchinitiative.org/solr/golr/"
-solr = pysolr.Solr(golr_url, timeout=5)
+# see SOLR_ENDPOINTS in settings
+solr = get_solr('golr')
 
-# TODO: move
-search_url = "https://solr.monarchinitiative.org/solr/search/"
-#solr = pysolr.Solr(golr_url, timeout=5)
+cache = make_cache(settings.GOLR_CACHE_MAX_ENTRIES,
+                   settings.GOLR_CACHE_MAX_BYTES,
+                   settings.GOLR_CACHE_TTL)
+inflight = SingleFlight()
+
+def set_cache(c):
+    """
+    Replaces the association result cache, e.g. with a NullCache
+    or any object implementing get(key) and put(key, value)
+    """
+    global cache
+    cache = c
+
+def cache_key(params, **kwargs):
+    """
+    Normalized, hashable key for a solr query plus translation flags
+    """
+    items = []
+    for (k, v) in sorted(params.items()):
+        if isinstance(v, list):
+            v = tuple(v)
+        items.append((k, v))
+    return (tuple(items),
+            bool(kwargs.get('exclude_evidence')),
+            kwargs.get('map_identifiers'))
 
 def translate_objs(d,name):
     if name not in d:
         # TODO: consider adding arg for failure on null
         return None
     
-    lf = M.label_field(name)
-    
-    objs = [{'id': idval} for idval in d[name]]
+    objs = [NamedObject(idval) for idval in d[name]]
     # todo - labels
     
     return objs
 
 
-def translate_obj(d,name):
+def translate_obj(d,name,intern_id=False):
     if name not in d:
         # TODO: consider adding arg for failure on null
         return None
     
     lf = M.label_field(name)
     
-    obj = {'id': d[name],
-            'label': d[lf],
-            }
+    id = d[name]
+    label = d.get(lf)
+    if intern_id:
+        id = intern_str(id)
+        label = intern_str(label)
+    obj = NamedObject(id, label)
 
     cf = name + "_category"
     if cf in d:
-        obj['category'] = d[cf]
+        obj.category = intern_str(d[cf])
     
     return obj
 
@@ -100,26 +128,29 @@ def translate_obj(d,name):
 def translate_doc(d, **kwargs):
     subject = translate_obj(d,M.SUBJECT)
     map_identifiers_to = kwargs.get('map_identifiers')
-    if map_identifiers_to:
+    if map_identifiers_to and subject is not None:
         if M.SUBJECT_CLOSURE in d:
-            subject['id'] = map_id(subject, map_identifiers_to, d[M.SUBJECT_CLOSURE])
+            subject.id = map_id(subject.id, map_identifiers_to, d[M.SUBJECT_CLOSURE])
         else:
             print("NO SUBJECT CLOSURE IN: "+str(d))
-    if M.SUBJECT_TAXON in d:
-        subject['taxon'] = translate_obj(d,M.SUBJECT_TAXON)
-    assoc = {'id':d[M.ID],
-             'subject': subject,
-             'object': translate_obj(d,'object'),
-             'relation': translate_obj(d,M.RELATION),
-             'publications': translate_objs(d,M.SOURCE),  # note 'source' is used in the golr schema
-             'provided_by': d[M.IS_DEFINED_BY]
-    }
-    if M.EVIDENCE_OBJECT in d:
-        assoc['evidence'] = d[M.EVIDENCE_OBJECT]
-    # solr does not allow nested objects, so evidence graph is json-encoded
-    if M.EVIDENCE_GRAPH in d:
-        assoc[M.EVIDENCE_GRAPH] = json.loads(d[M.EVIDENCE_GRAPH])
-    return assoc
+    if M.SUBJECT_TAXON in d and subject is not None:
+        subject.taxon = translate_obj(d,M.SUBJECT_TAXON,intern_id=True)
+    provided_by = d.get(M.IS_DEFINED_BY)
+    if provided_by is not None:
+        provided_by = [intern_str(x) for x in provided_by]
+    evidence = d.get(M.EVIDENCE_OBJECT)
+    if evidence is not None:
+        evidence = [intern_str(x) for x in evidence]
+    # solr does not allow nested objects, so evidence graph is json-encoded;
+    # it is kept as a string until something reads it
+    return Association(d[M.ID],
+                       subject=subject,
+                       object=translate_obj(d,'object'),
+                       relation=translate_obj(d,M.RELATION,intern_id=True),
+                       publications=translate_objs(d,M.SOURCE),  # note 'source' is used in the golr schema
+                       provided_by=provided_by,
+                       evidence=evidence,
+                       evidence_graph_json=d.get(M.EVIDENCE_GRAPH))
 
 def translate_docs(ds, **kwargs):
     return [translate_doc(d, **kwargs) for d in ds]
@@ -137,6 +168,152 @@ def get_association(id, **kwargs):
     results = search_associations(id=id, **kwargs)
     return results['associations'][0]
 
+def get_associations(ids, **kwargs):
+    """
+    Fetches many associations by ID in a single solr query
+
+    Returns an OrderedDict mapping each input ID to its Association,
+    or to None if there is no such association
+    """
+    if len(ids) > settings.GOLR_BATCH_MAX_IDS:
+        raise ValueError('Batch too large: {} ids, maximum is {}'.format(len(ids), settings.GOLR_BATCH_MAX_IDS))
+    ids = list(OrderedDict.fromkeys(ids))
+    resultmap = OrderedDict((id, None) for id in ids)
+    if not ids:
+        return resultmap
+    query = SolrQuery()
+    query.where_any(M.ID, ids)
+    query.set('fl', ",".join(get_select_fields(**kwargs)))
+    query.set('rows', len(ids))
+    results = solr.search(**query.to_params())
+    for a in translate_docs(results.docs, **kwargs):
+        if a.id in resultmap:
+            resultmap[a.id] = a
+    return resultmap
+
+# golr fields required to render each field of the association model
+ASSOCIATION_MODEL_FIELDS = OrderedDict([
+    ('id', [M.ID]),
+    ('provided_by', [M.IS_DEFINED_BY]),
+    ('publications', [M.SOURCE]),
+    ('subject', [M.SUBJECT, M.SUBJECT_LABEL]),
+    ('relation', [M.RELATION, M.RELATION_LABEL]),
+    ('object', [M.OBJECT, M.OBJECT_LABEL]),
+    ('evidence', [M.EVIDENCE_OBJECT]),
+    ('evidence_graph', [M.EVIDENCE_GRAPH]),
+])
+
+def association_mask(mask):
+    """
+    Returns the part of a response mask that applies to an association,
+    or None if all association fields are rendered
+
+    mask is a flask-restplus response mask (the X-Fields header), either
+    as a string or parsed. It may apply to an association results object
+    or directly to an association. Leaf fields of a parsed mask are True
+    rather than a Mask, and select all of their subfields.
+    """
+    if isinstance(mask, str):
+        mask = Mask(mask)
+    if isinstance(mask, Mask) and 'associations' in mask:
+        mask = mask['associations']
+    if not isinstance(mask, Mask) or not mask or '*' in mask:
+        return None
+    return mask
+
+def get_select_fields(mask=None, exclude_evidence=False, map_identifiers=None, **kwargs):
+    """
+    Returns the golr fields (fl) needed to render the requested response;
+    only fields that will actually be rendered (see association_mask)
+    are fetched
+    """
+    mask = association_mask(mask)
+    names = list(ASSOCIATION_MODEL_FIELDS.keys()) if mask is None else list(mask.keys())
+    if exclude_evidence:
+        names = [n for n in names if n not in ('evidence', 'evidence_graph')]
+    select_fields = [M.ID]
+    for n in names:
+        for f in ASSOCIATION_MODEL_FIELDS.get(n, []):
+            if f not in select_fields:
+                select_fields.append(f)
+    if 'subject' in names:
+        if map_identifiers:
+            select_fields.append(M.SUBJECT_CLOSURE)
+        if mask is not None and isinstance(mask['subject'], Mask) and 'taxon' in mask['subject']:
+            select_fields += [M.SUBJECT_TAXON, M.SUBJECT_TAXON_LABEL]
+    return select_fields
+
+FACET_PARAMS = ('facet', 'facet.field', 'facet.limit', 'facet.mincount', 'facet.pivot')
+
+def set_facets(query, facet_fields=None, facet_pivots=None, facet_limit=None, facet_mincount=None, **kwargs):
+    """
+    Adds faceting to a query, only if facets were requested
+
+    facet_fields is a list of golr fields, e.g. subject_taxon_label;
+    facet_pivots is a list of comma-separated field lists, e.g.
+    subject_category,object_category
+    """
+    if not facet_fields and not facet_pivots:
+        return query
+    query.set('facet', 'on')
+    if facet_fields:
+        query.set('facet.field', list(facet_fields))
+    if facet_pivots:
+        query.set('facet.pivot', list(facet_pivots))
+    query.set('facet.limit', facet_limit if facet_limit is not None else settings.GOLR_FACET_LIMIT)
+    if facet_mincount is not None:
+        query.set('facet.mincount', facet_mincount)
+    return query
+
+def build_association_query(subject_category=None,
+                            object_category=None,
+                            relation=None,
+                            subject=None,
+                            object=None,
+                            subject_taxon=None,
+                            fq=None,
+                            **kwargs):
+    """
+    Returns a SolrQuery for an association query
+
+    Categories, relation and taxon become separate filter queries, so
+    solr can reuse its cached filters across queries; additional filters
+    can be passed as fq, a dict of field to value (or list of values)
+    """
+    query = SolrQuery()
+    for (field, value) in [(M.SUBJECT_CATEGORY, subject_category),
+                           (M.OBJECT_CATEGORY, object_category),
+                           (M.RELATION, relation),
+                           (M.SUBJECT_TAXON_CLOSURE, subject_taxon)]:
+        if value is not None:
+            query.filter(field, value)
+    if fq is not None:
+        for (field, value) in sorted(fq.items()):
+            if isinstance(value, (list, tuple)):
+                query.filter_any(field, value)
+            else:
+                query.filter(field, value)
+
+    if object is not None:
+        # TODO: make configurable whether to use closure
+        query.where(M.OBJECT_CLOSURE, object)
+    if subject is not None:
+        # note: by including subject closure by default,
+        # we automaticaly get equivalent nodes
+        query.where(M.SUBJECT_CLOSURE, subject)
+    if 'id' in kwargs:
+        query.where(M.ID, kwargs['id'])
+
+    select_fields = get_select_fields(**kwargs)
+
+    rows = kwargs.get('rows') or 10
+    page = kwargs.get('page') or 1
+    set_facets(query, **kwargs)
+    query.set('fl', ",".join(select_fields))
+    query.set('rows', rows)
+    query.set('start', (page - 1) * rows)
+    return query
+
 def search_associations(subject_category=None,
                         object_category=None,
                         relation=None,
@@ -145,53 +322,13 @@ def search_associations(subject_category=None,
                         subject_taxon=None,
                         **kwargs):
     
-    qmap = {}
-    if subject_category is not None:
-        qmap['subject_category'] = subject_category
-    if object_category is not None:
-        qmap['object_category'] = object_category
-    
-    if object is not None:
-        # TODO: make configurable whether to use closure
-        qmap['object_closure'] = object
-    if subject is not None:
-        # note: by including subject closure by default,
-        # we automaticaly get equivalent nodes
-        qmap['subject_closure'] = subject
-    if subject_taxon is not None:
-        qmap['subject_taxon_closure'] = subject_taxon
-    if 'id' in kwargs:
-        qmap['id'] = kwargs['id']
-
-    # UGLY! doesn't pysolr help with this? Need to be careful with escaping?
-    qstr = " AND ".join(['{}:"{}"'.format(k,v) for (k,v) in qmap.items()])
-    print('Q:'+qstr)
-    select_fields = [
-        M.ID,
-        M.IS_DEFINED_BY,
-        M.SOURCE,
-        M.SUBJECT,
-        M.SUBJECT_LABEL,
-        M.SUBJECT_CLOSURE,  # TODO - only required if map_identifiers set
-        M.RELATION,
-        M.RELATION_LABEL,
-        M.OBJECT,
-        M.OBJECT_LABEL,
-    ]
-    if 'exclude_evidence' not in kwargs or not kwargs['exclude_evidence']:
-        select_fields += [
-            M.EVIDENCE_OBJECT,
-            M.EVIDENCE_GRAPH
-        ]
-
-    params = {
-        'q': qstr,
-        'facet': 'on',
-        'facet.field': [M.SUBJECT_TAXON_LABEL],
-        'facet.limit': 25,
-        'fl': ",".join(select_fields),
-        'rows': 10,
-    }
+    query = build_association_query(subject_category, object_category, relation,
+                                    subject, object, subject_taxon, **kwargs)
+    params = query.to_params()
+    key = cache_key(params, **kwargs)
+    return cached_call(cache, inflight, key, lambda: _execute_search(params, **kwargs))
+
+def _execute_search(params, **kwargs):
     results = solr.search(**params)
     fcs = results.facets
     associations = translate_docs(results.docs, **kwargs)
@@ -199,3 +336,73 @@ def search_associations(subject_category=None,
         'associations':associations,
         'facet_counts':fcs
     }
+
+def iter_associations(subject_category=None,
+                      object_category=None,
+                      relation=None,
+                      subject=None,
+                      object=None,
+                      subject_taxon=None,
+                      batch_size=None,
+                      **kwargs):
+    """
+    Generator over all associations matching a query.
+
+    Walks the full result set with a solr cursorMark, fetching
+    batch_size docs per round trip, so memory use is constant
+    regardless of the number of results. Results are not cached.
+    """
+    query = build_association_query(subject_category, object_category, relation,
+                                    subject, object, subject_taxon, **kwargs)
+    # cursors require a sort on the uniqueKey and no paging offset
+    query.unset('start', *FACET_PARAMS)
+    query.set('rows', batch_size or settings.GOLR_EXPORT_BATCH_SIZE)
+    query.set('sort', M.ID + ' asc')
+    for d in iter_docs(solr, query.to_params()):
+        yield translate_doc(d, **kwargs)
+
+def batch_search_associations(subjects=None,
+                              objects=None,
+                              subject_category=None,
+                              object_category=None,
+                              relation=None,
+                              subject_taxon=None,
+                              rows=10,
+                              **kwargs):
+    """
+    Searches associations for many subjects (or many objects) at once
+
+    Issues a single grouped solr query with one group per input ID,
+    returning up to rows associations for each. Results are keyed
+    by input ID, in the same form as search_associations.
+    """
+    if (subjects is None) == (objects is None):
+        raise ValueError('Exactly one of subjects or objects must be specified')
+    if subjects is not None:
+        (ids, field) = (subjects, M.SUBJECT_CLOSURE)
+    else:
+        (ids, field) = (objects, M.OBJECT_CLOSURE)
+    if len(ids) > settings.GOLR_BATCH_MAX_IDS:
+        raise ValueError('Batch too large: {} ids, maximum is {}'.format(len(ids), settings.GOLR_BATCH_MAX_IDS))
+    ids = list(OrderedDict.fromkeys(ids))
+    rows = rows or 10
+
+    query = build_association_query(subject_category, object_category, relation,
+                                    None, None, subject_taxon, **kwargs)
+    query.unset('start', *FACET_PARAMS)
+    group_queries = [term_query(field, id) for id in ids]
+    query.where_any(field, ids)
+    query.set('rows', len(ids) * rows)
+    query.set('group', 'true')
+    query.set('group.query', group_queries)
+    query.set('group.limit', rows)
+    results = solr.search(**query.to_params())
+    resultmap = OrderedDict()
+    for (id, gq) in zip(ids, group_queries):
+        group = results.grouped.get(gq, {})
+        doclist = group.get('doclist', {})
+        resultmap[id] = {
+            'numFound': doclist.get('numFound', 0),
+            'associations': translate_docs(doclist.get('docs', []), **kwargs)
+        }
+    return resultmap
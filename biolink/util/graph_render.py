@@ -0,0 +1,162 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent import futures
+from concurrent.futures.process import BrokenProcessPool
+
+from biolink import settings
+from biolink.util.singleflight import SingleFlight
+
+FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(settings.RENDER_MAX_PENDING)
+inflight = SingleFlight()
+
+
+class RenderBusy(Exception):
+    """
+    Raised when the render pool is saturated or a render times out
+    """
+
+
+def node_label(n, data):
+    # obograph node dicts are stored as node data (networkx 1.x) or
+    # under an attr_dict attribute (networkx 2.x)
+    node = data.get('attr_dict', data)
+    return node.get('lbl') or n
+
+
+def render(graph, format='png'):
+    """
+    Renders an obograph json graph to image bytes.
+
+    Draws on a standalone matplotlib Figure with the Agg canvas, so no
+    global pyplot state or display is involved. Runs in a worker process.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    import networkx as nx
+    from biolink.core.ontology.obograph_util import convert_json_object
+
+    digraph = convert_json_object({'graphs': [graph]})
+    fig = Figure(figsize=settings.RENDER_FIGSIZE)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(1, 1, 1)
+    ax.set_axis_off()
+    pos = nx.spring_layout(digraph)
+    labels = {n: node_label(n, d) for (n, d) in digraph.nodes(data=True)}
+    nx.draw_networkx(digraph, pos=pos, ax=ax, labels=labels, node_size=300, font_size=8)
+    buf = io.BytesIO()
+    fig.savefig(buf, format=format, bbox_inches='tight')
+    return buf.getvalue()
+
+
+def new_executor():
+    # workers are spawned rather than forked: forking a process that
+    # already runs threads (request handlers, prebuild) can copy locks
+    # held by those threads into the child
+    return futures.ProcessPoolExecutor(max_workers=settings.RENDER_MAX_WORKERS,
+                                       mp_context=multiprocessing.get_context('spawn'))
+
+
+def get_executor():
+    """
+    Returns the shared process pool used for rendering
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = new_executor()
+        return _executor
+
+
+def reset_executor(broken):
+    """
+    Replaces a pool broken by a crashed worker, unless another thread
+    already has
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = new_executor()
+    broken.shutdown(wait=False)
+
+
+def start():
+    """
+    Creates the render pool; called once at app startup
+    """
+    get_executor()
+
+
+def graph_hash(graph):
+    return hashlib.sha256(json.dumps(graph, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def cache_path(id, graph, format):
+    """
+    Content-addressed cache location for a rendered association graph
+    """
+    key = hashlib.sha256('{}\n{}\n{}'.format(id, graph_hash(graph), format).encode('utf-8')).hexdigest()
+    return os.path.join(settings.RENDER_CACHE_DIR, key[:2], key + '.' + format)
+
+
+def _submit(graph, format):
+    executor = get_executor()
+    try:
+        return (executor, executor.submit(render, graph, format))
+    except BrokenProcessPool:
+        # a worker died since the last render
+        reset_executor(executor)
+        executor = get_executor()
+        return (executor, executor.submit(render, graph, format))
+
+
+def _render_to_file(graph, format, fn):
+    if not _slots.acquire(timeout=settings.RENDER_TIMEOUT):
+        raise RenderBusy('Too many pending renders')
+    try:
+        (executor, future) = _submit(graph, format)
+    except Exception:
+        _slots.release()
+        raise
+    # the slot is held until the render finishes, even if we stop waiting
+    future.add_done_callback(lambda f: _slots.release())
+    try:
+        data = future.result(timeout=settings.RENDER_TIMEOUT)
+    except futures.TimeoutError:
+        future.cancel()
+        raise RenderBusy('Render timed out')
+    except BrokenProcessPool:
+        # a worker died mid-render, e.g. killed for using too much memory
+        reset_executor(executor)
+        raise RenderBusy('Render worker crashed')
+    # write then rename, so other workers never see a partial file
+    os.makedirs(os.path.dirname(fn), exist_ok=True)
+    (fd, tmp) = tempfile.mkstemp(dir=os.path.dirname(fn), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, fn)
+    return fn
+
+
+def get_image(id, graph, format='png'):
+    """
+    Returns the path of the rendered image of an association's evidence
+    graph, rendering it only if not already cached
+    """
+    if format not in FORMATS:
+        raise ValueError('Unknown format: {}'.format(format))
+    fn = cache_path(id, graph, format)
+    if os.path.exists(fn):
+        return fn
+    return inflight.do(fn, lambda: _render_to_file(graph, format, fn))
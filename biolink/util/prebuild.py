@@ -0,0 +1,75 @@
+"""
+Builds the structures that are too expensive to build in a request,
+e.g. autocomplete indexes, slim mappers and enrichment backgrounds, in
+a background thread at startup.
+
+Until a structure is built, requests needing it fail fast with NotReady
+(503) rather than building it themselves. Failed builds are retried
+every PREBUILD_RETRY_INTERVAL seconds.
+"""
+import logging
+import threading
+import time
+from functools import partial
+
+from biolink import settings
+from biolink.core.ontology import registry
+from biolink.util import autocomplete, backgrounds
+
+log = logging.getLogger(__name__)
+
+
+def tasks():
+    """
+    Returns (name, function) pairs, one per structure configured in settings
+    """
+    result = []
+    # autocomplete first, as it serves interactive typing
+    for c in autocomplete.categories():
+        result.append(('autocomplete index {}'.format(c), partial(autocomplete.build_index, c)))
+    for (ontology, subset) in registry.slim_subsets():
+        result.append(('slim {} {}'.format(ontology, subset), partial(registry.build_slim_mapper, ontology, subset)))
+    for b in backgrounds.enrichment_backgrounds():
+        result.append(('enrichment background {}'.format(b), partial(backgrounds.build_enrichment_engine, *b)))
+    for c in backgrounds.similarity_candidates():
+        result.append(('similarity candidates {}'.format(c), partial(backgrounds.build_similarity_engine, *c)))
+    return result
+
+
+def run(pending):
+    """
+    Runs each task in turn, returning those that failed
+    """
+    failed = []
+    for (name, task) in pending:
+        t = time.time()
+        try:
+            task()
+        except Exception:
+            log.exception("Could not build {}".format(name))
+            failed.append((name, task))
+            continue
+        log.info("Built {} in {:.1f}s".format(name, time.time() - t))
+    return failed
+
+
+def prebuild():
+    """
+    Builds every configured structure, retrying failures until all
+    have been built
+    """
+    pending = run(tasks())
+    while pending:
+        time.sleep(settings.PREBUILD_RETRY_INTERVAL)
+        pending = run(pending)
+
+
+def start():
+    """
+    Starts prebuild in a daemon thread, so the server answers other
+    requests while it runs
+    """
+    thread = threading.Thread(target=prebuild, name='prebuild')
+    thread.daemon = True
+    thread.start()
+    return thread
@@ -0,0 +1,171 @@
+import logging
+import re
+import threading
+import time
+
+import pysolr
+import requests
+from requests.adapters import HTTPAdapter
+from biolink import settings
+
+log = logging.getLogger(__name__)
+
+
+class SolrUnavailable(pysolr.SolrError):
+    """
+    Raised without contacting solr while the circuit breaker is open
+    """
+    pass
+
+
+class CircuitBreaker:
+    """
+    Fails fast after a run of consecutive failures.
+
+    Once failure_threshold consecutive calls have failed the breaker
+    opens and rejects calls for reset_timeout seconds; after that a
+    single trial call is let through, closing the breaker if it succeeds.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_progress = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_in_progress or time.time() < self.opened_at + self.reset_timeout:
+                return False
+            # half-open: let one caller probe solr
+            self.trial_in_progress = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_progress = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    log.warning("Opening solr circuit breaker after {} failures".format(self.failures))
+                self.opened_at = time.time()
+
+    def is_open(self):
+        return self.opened_at is not None
+
+
+def is_transient(e):
+    """
+    True if a solr error is worth retrying: timeouts, connection
+    failures and 5xx responses, but not malformed queries (4xx)
+    """
+    m = re.search(r'\(HTTP (\d+)\)', str(e))
+    if m:
+        return int(m.group(1)) >= 500
+    return True
+
+
+class SolrClient:
+    """
+    Wraps a pysolr.Solr with a pooled keep-alive session, bounded
+    retries with exponential backoff, and a circuit breaker.
+
+    Exposes the same search() signature as pysolr.Solr.
+    """
+
+    def __init__(self, url, timeout=5, pool_size=10, retries=2, backoff=0.2,
+                 breaker_failures=5, breaker_reset=30):
+        self.url = url
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset)
+        session = requests.Session()
+        session.stream = False
+        # requests keeps pooled connections alive between calls
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        self.solr = pysolr.Solr(url, timeout=timeout)
+        self.solr.session = session
+
+    def search(self, q, **kwargs):
+        if not self.breaker.allow():
+            raise SolrUnavailable("Solr at {} is unavailable; not retrying until circuit resets".format(self.url))
+        attempt = 0
+        while True:
+            try:
+                results = self.solr.search(q, **kwargs)
+                self.breaker.record_success()
+                return results
+            except pysolr.SolrError as e:
+                if not is_transient(e):
+                    # solr is healthy, the query is bad
+                    self.breaker.record_success()
+                    raise
+                if attempt >= self.retries or self.breaker.is_open():
+                    self.breaker.record_failure()
+                    raise
+                log.warning("Retrying solr query after error: {}".format(e))
+                time.sleep(self.backoff * (2 ** attempt))
+                attempt += 1
+            except BaseException:
+                # anything else, e.g. an undecodable response or an
+                # interrupt, still counts, so a half-open trial always
+                # ends with the breaker either closed or reopened
+                self.breaker.record_failure()
+                raise
+
+
+def iter_docs(client, params):
+    """
+    Generator over all docs matching select params, walking the result
+    set with a solr cursorMark. params must sort on the uniqueKey, have
+    no start offset and set rows to the number of docs per round trip
+    """
+    params = dict(params)
+    cursor = '*'
+    while True:
+        params['cursorMark'] = cursor
+        results = client.search(**params)
+        for d in results.docs:
+            yield d
+        next_cursor = results.nextCursorMark
+        if next_cursor is None or next_cursor == cursor:
+            break
+        cursor = next_cursor
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_solr(name):
+    """
+    Returns the shared client for a named endpoint in settings.SOLR_ENDPOINTS
+
+    Endpoint entries may override any of the global pool, retry and
+    circuit breaker settings
+    """
+    with _clients_lock:
+        if name not in _clients:
+            conf = {
+                'timeout': settings.SOLR_TIMEOUT,
+                'pool_size': settings.SOLR_POOL_SIZE,
+                'retries': settings.SOLR_RETRIES,
+                'backoff': settings.SOLR_RETRY_BACKOFF,
+                'breaker_failures': settings.SOLR_BREAKER_FAILURES,
+                'breaker_reset': settings.SOLR_BREAKER_RESET,
+            }
+            conf.update(settings.SOLR_ENDPOINTS[name])
+            _clients[name] = SolrClient(**conf)
+        return _clients[name]
@@ -0,0 +1,76 @@
+def escape_value(v):
+    """
+    Quotes a value as a solr phrase, escaping backslashes and quotes
+
+    Everything else is literal inside a phrase, so CURIEs, spaces
+    and query syntax characters in user input are safe
+    """
+    v = str(v).replace('\\', '\\\\').replace('"', '\\"')
+    return '"' + v + '"'
+
+
+def term_query(field, value):
+    """
+    Returns a query clause matching a field to an exact value
+    """
+    return '{}:{}'.format(field, escape_value(value))
+
+
+def any_of(field, values):
+    """
+    Returns a query clause matching a field to any of a list of values
+    """
+    return '{}:({})'.format(field, " OR ".join(escape_value(v) for v in values))
+
+
+class SolrQuery:
+    """
+    Builds solr select params.
+
+    Constraints shared by many queries (categories, taxa, relations)
+    should be added with filter(): each becomes its own fq, which solr
+    caches independently in its filterCache and reuses across queries.
+    High-cardinality constraints such as entity IDs belong in the main
+    query (where()), as caching them would only churn the filterCache.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.filters = []
+        self.params = {}
+
+    def where(self, field, value):
+        self.clauses.append(term_query(field, value))
+        return self
+
+    def where_any(self, field, values):
+        self.clauses.append(any_of(field, values))
+        return self
+
+    def filter(self, field, value):
+        self.filters.append(term_query(field, value))
+        return self
+
+    def filter_any(self, field, values):
+        self.filters.append(any_of(field, values))
+        return self
+
+    def filter_raw(self, fq):
+        self.filters.append(fq)
+        return self
+
+    def set(self, name, value):
+        self.params[name] = value
+        return self
+
+    def unset(self, *names):
+        for name in names:
+            self.params.pop(name, None)
+        return self
+
+    def to_params(self):
+        params = {'q': " AND ".join(self.clauses) if self.clauses else '*:*'}
+        if self.filters:
+            params['fq'] = list(self.filters)
+        params.update(self.params)
+        return params
@@ -0,0 +1,84 @@
+"""
+A page of variant sets is loaded with a constant number of queries,
+whatever its size, unless the category relationship is loaded lazily
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from biolink import settings
+from tests.query_counter import count_queries
+
+PAGE_SIZES = [2, 10, 50]
+ROWS = 60
+
+
+@pytest.fixture(scope='module')
+def app():
+    settings.SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    settings.PREBUILD_ON_STARTUP = False
+    from biolink.app import app, initialize_app
+    from biolink.database import db
+    from biolink.database.models import VariantSet, Category
+
+    initialize_app(app)
+    app.config['SERVER_NAME'] = None
+    with app.app_context():
+        db.create_all()
+        start = datetime(2017, 3, 1)
+        # one category per row, so each lazy load is a separate query
+        for i in range(ROWS):
+            db.session.add(VariantSet('set {}'.format(i), 'body', Category('category {}'.format(i)),
+                                      start + timedelta(days=i)))
+        db.session.commit()
+        db.session.remove()
+    return app
+
+
+def page_queries(app, per_page):
+    from biolink.database import db
+
+    with app.app_context():
+        engine = db.get_engine(app)
+    client = app.test_client()
+    with count_queries(engine) as counter:
+        response = client.get('/api/variation/set/?count=false&per_page={}'.format(per_page))
+    assert response.status_code == 200
+    page = json.loads(response.data.decode('utf-8'))
+    assert len(page['items']) == per_page
+    assert all(item['category'] is not None for item in page['items'])
+    return counter.count
+
+
+@pytest.mark.parametrize('strategy', ['joined', 'selectin', 'subquery'])
+def test_eager_loading_is_constant(app, monkeypatch, strategy):
+    monkeypatch.setattr(settings, 'VARIATION_EAGER_LOADING', strategy)
+    counts = [page_queries(app, per_page) for per_page in PAGE_SIZES]
+    assert len(set(counts)) == 1
+    assert counts[0] <= 2
+
+
+def test_lazy_loading_grows_with_page_size(app, monkeypatch):
+    monkeypatch.setattr(settings, 'VARIATION_EAGER_LOADING', 'lazy')
+    counts = [page_queries(app, per_page) for per_page in PAGE_SIZES]
+    assert counts == [1 + per_page for per_page in PAGE_SIZES]
+
+
+def get_page(app, query):
+    response = app.test_client().get('/api/variation/set/?' + query)
+    assert response.status_code == 200
+    return json.loads(response.data.decode('utf-8'))
+
+
+def test_page_numbers_and_totals(app):
+    first = get_page(app, 'per_page=10')
+    assert (first['page'], first['total'], first['pages']) == (1, ROWS, ROWS // 10)
+    following = get_page(app, 'per_page=10&cursor=' + first['next_cursor'])
+    assert following['page'] is None
+    offset = get_page(app, 'per_page=10&page=2')
+    assert (offset['page'], offset['total']) == (2, ROWS)
+    assert [i['id'] for i in offset['items']] == [i['id'] for i in following['items']]
+    assert offset['next_cursor'] == following['next_cursor']
+    uncounted = get_page(app, 'per_page=10&page=2&count=false')
+    assert (uncounted['page'], uncounted['total'], uncounted['pages']) == (2, None, None)